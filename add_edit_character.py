@@ -4,6 +4,9 @@ import json
 import re
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageDraw 
+import app_settings
+import image_store
+import model_detect
 
 
 CATEGORY_FOLDERS = {
@@ -18,24 +21,6 @@ COLOUR_MAP = {
     "Misc":       "#113311",  # dark green
 }
 
-SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
-
-def _load_last_category(default_value: str = "Characters") -> str:
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data.get("last_category", default_value)
-    except Exception:
-        return default_value
-
-def _save_last_category(category: str) -> None:
-    try:
-        data = {"last_category": category}
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"[Settings] Failed to save last_category: {e}")
-
 class AddEditCharacter(ctk.CTkFrame):
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -74,13 +59,20 @@ class AddEditCharacter(ctk.CTkFrame):
         # --- Basic Info ---
         self.name_entry = self._make_labeled_entry(self.scroll_frame, "Name", 2)
         self.file_entry = self._make_labeled_entry(self.scroll_frame, "File Name", 3)
+        # Fill Model Type from the LoRA's header once a findable file name is entered
+        self.file_entry.bind("<FocusOut>", lambda e: self._auto_detect_model_type(), add="+")
         self.source_entry = self._make_labeled_entry(self.scroll_frame, "Source", 4)
 
         # --- Model Type Dropdown ---
         ctk.CTkLabel(self.scroll_frame, text="Model Type:").grid(row=5, column=0, sticky="w", padx=40)
-        self.model_type_option = ctk.CTkOptionMenu(self.scroll_frame, values=["Illustrious", "SD 1.5", "SD 2.0", "SD 2.1", "SD 3.0", "SD 3.5 Medium", "SD 3.5 Large", "Pony", "SDXL", "Other"])
+        type_row = ctk.CTkFrame(self.scroll_frame, fg_color="transparent")
+        type_row.grid(row=6, column=0, sticky="we", padx=40, pady=(0, 10))
+        self.model_type_option = ctk.CTkOptionMenu(type_row, values=model_detect.MODEL_TYPES)
         self.model_type_option.set("Illustrious")
-        self.model_type_option.grid(row=6, column=0, sticky="we", padx=40, pady=(0, 10))
+        self.model_type_option.pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(type_row, text="Detect", width=90, command=self.detect_model_type).pack(side="left", padx=(6, 0))
+        self.detect_label = ctk.CTkLabel(type_row, text="", font=("Arial", 11))
+        self.detect_label.pack(side="left", padx=(8, 0))
 
         # --- Tags Section ---
         ctk.CTkLabel(self.scroll_frame, text="Tags:").grid(row=7, column=0, sticky="w", padx=40)
@@ -125,14 +117,16 @@ class AddEditCharacter(ctk.CTkFrame):
 
         # --- Category dropdown (controls save/load folder) ---
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        last_cat = _load_last_category("Characters")
+        last_cat = app_settings.load().get("last_category", "Characters")
+        if last_cat not in CATEGORY_FOLDERS:
+            last_cat = "Characters"  # e.g. the catalogue's "All" view has no folder to save into
         self.category_var = ctk.StringVar(value=last_cat)
 
         def _set_category(cat):
             folder = CATEGORY_FOLDERS.get(cat, "Character JSONs")
             self.save_dir = os.path.join(self.base_dir, folder)
             os.makedirs(self.save_dir, exist_ok=True)
-            _save_last_category(cat)  # persist on change
+            app_settings.update(last_category=cat)  # persist on change
             self._apply_category_theme(cat)  # < add this
 
         cat_row = ctk.CTkFrame(self.layout_container, fg_color="transparent")
@@ -143,6 +137,12 @@ class AddEditCharacter(ctk.CTkFrame):
         ctk.CTkOptionMenu(cat_row, values=list(CATEGORY_FOLDERS.keys()),
                           variable=self.category_var, command=_set_category).grid(row=0, column=1, sticky="w")
 
+        # On save, copy the entry's images into the local content-addressed store (see image_store.py)
+        self.use_store_var = ctk.BooleanVar(value=image_store.load_settings()["enabled"])
+        ctk.CTkCheckBox(cat_row, text="Copy images to local store", variable=self.use_store_var,
+                        command=lambda: image_store.save_enabled(self.use_store_var.get())
+                        ).grid(row=0, column=2, sticky="e")
+
         # initialise folder
         _set_category(self.category_var.get())
 
@@ -188,6 +188,61 @@ class AddEditCharacter(ctk.CTkFrame):
         entry.pack(fill="x")
         return entry
 
+    def _to_store(self, path: str) -> str:
+        # Store ref for path when the local store is on; the original path otherwise
+        if not path or not self.use_store_var.get():
+            return path
+        store = image_store.ImageStore(self.base_dir, image_store.load_settings()["max_side"])
+        return store.try_ingest(path)
+
+    def _detect_quietly(self, file_name: str):
+        # Detection for a LoRA that can be found without asking (full path or a remembered folder)
+        path = model_detect.find_lora(file_name, model_detect.load_lora_dirs())
+        if path is None:
+            return None
+        try:
+            found = model_detect.detect(path)
+        except (OSError, ValueError) as e:
+            print(f"[Detect] Could not read '{path}': {e}")
+            return None
+        if found is not None:
+            self.detect_label.configure(text=f"{found['arch']} ({found['evidence']})")
+        return found
+
+    def _apply_detection(self, found):
+        current = self.model_type_option.get()
+        if not model_detect.agrees(current, found["arch"]):
+            # e.g. keep "Pony" for an SDXL LoRA, but replace "SD 1.5"
+            self.model_type_option.set(found["model_type"])
+
+    def _auto_detect_model_type(self):
+        found = self._detect_quietly(self.file_entry.get())
+        if found is not None:
+            self._apply_detection(found)
+
+    def detect_model_type(self):
+        # Reads only the safetensors header (tensor names/shapes), never the weights
+        dirs = model_detect.load_lora_dirs()
+        path = model_detect.find_lora(self.file_entry.get(), dirs)
+        if path is None:
+            path = filedialog.askopenfilename(initialdir=dirs[0] if dirs else None,
+                                              filetypes=[("LoRA", "*.safetensors")])
+            if not path:
+                return
+            model_detect.remember_lora_dir(os.path.dirname(path))
+            if not self.file_entry.get().strip():
+                self.file_entry.insert(0, os.path.basename(path))
+        try:
+            found = model_detect.detect(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Detect Failed", f"Could not read the safetensors header:\n{e}")
+            return
+        if found is None:
+            self.detect_label.configure(text="Unknown architecture")
+            return
+        self.detect_label.configure(text=f"{found['arch']} ({found['evidence']})")
+        self._apply_detection(found)
+
     def select_image(self):
         file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp")])
         if file_path:
@@ -239,6 +294,7 @@ class AddEditCharacter(ctk.CTkFrame):
         self.file_entry.delete(0, "end")
         self.source_entry.delete(0, "end")
         self.model_type_option.set("Illustrious")
+        self.detect_label.configure(text="")
         self.notes_box.delete("1.0", "end")
         for widget in self.tags_frame.winfo_children():
             widget.destroy()
@@ -265,6 +321,23 @@ class AddEditCharacter(ctk.CTkFrame):
         filename = f"{safe}.json"
         file_path = os.path.join(self.save_dir, filename)
 
+        # Overwrite prompt if file exists
+        if os.path.exists(file_path):
+            ok = messagebox.askyesno(
+                "Overwrite file?",
+                f"A file named '{filename}' already exists in\n{self.save_dir}\n\nDo you want to overwrite it?"
+            )
+            if not ok:
+                return
+
+        # Copy into the store only once the save is going ahead (a cancel leaves no orphans);
+        # the form keeps the refs, so saving again doesn't re-read the images
+        if self.image_path:
+            self.image_path = self._to_store(self.image_path)
+        for (_, pv, _) in self.extra_image_rows:
+            if pv.get().strip():
+                pv.set(self._to_store(pv.get().strip()))
+
         data = {
             "name": name,
             "file_name": self.file_entry.get(),
@@ -284,19 +357,16 @@ class AddEditCharacter(ctk.CTkFrame):
             "image_path": self.image_path or ""
         }
 
-        # Overwrite prompt if file exists
-        if os.path.exists(file_path):
-            ok = messagebox.askyesno(
-                "Overwrite file?",
-                f"A file named '{filename}' already exists in\n{self.save_dir}\n\nDo you want to overwrite it?"
-            )
-            if not ok:
-                return
-
         try:
             with open(file_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=4)
             print(f"[Saved] {file_path}")
+            # Keep the catalogue's in-memory index current without a full reload
+            catalogue = getattr(self.controller, "frames", {}).get("CharacterCatalogue")
+            if catalogue is not None and hasattr(catalogue, "index"):
+                catalogue.index.add(file_path, self.category_var.get())
+                if hasattr(catalogue, "grid_view"):
+                    catalogue.grid_view.refresh_thumbnail(file_path)
             messagebox.showinfo("Saved", f"Saved to:\n{file_path}")
         except Exception as e:
             messagebox.showerror("Save Failed", f"Could not save file:\n{e}")
@@ -316,7 +386,12 @@ class AddEditCharacter(ctk.CTkFrame):
         self.name_entry.insert(0, data.get("name", ""))
         self.file_entry.insert(0, data.get("file_name", ""))
         self.source_entry.insert(0, data.get("source", ""))
-        self.model_type_option.set(data.get("model_type", "1.5"))
+        # Stored value if it's one of the options (legacy spellings mapped), else detect from the LoRA
+        model_type = model_detect.normalise_model_type(data.get("model_type", ""))
+        if model_type is None:
+            found = self._detect_quietly(data.get("file_name", ""))
+            model_type = found["model_type"] if found else "Other"
+        self.model_type_option.set(model_type)
         self.notes_box.insert("1.0", data.get("notes", ""))
 
         for tag in data.get("tags", []):
@@ -357,6 +432,7 @@ class AddEditCharacter(ctk.CTkFrame):
      
     def _load_preview_image(self, image_path: str):
         """Open image at path, scale shortest side to 300px keeping aspect, and set on label."""
+        image_path = image_store.resolve(image_path, self.base_dir) if image_path else image_path
         if not image_path or not os.path.exists(image_path):
             self._clear_preview()
             # clear preview if missing/invalid
@@ -0,0 +1,31 @@
+# app_settings.py
+"""app_settings.json: the small preferences shared by the app and the command-line tools.
+
+Keys in use: "last_category", "image_store" ({"enabled", "max_side"}) and "lora_dirs".
+Every writer goes through update(), which keeps the keys it isn't changing.
+"""
+import os, json
+
+from catalogue_index import write_text_atomic
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
+
+
+def load() -> dict:
+    """Every saved setting; empty if the file is missing or unreadable."""
+    try:
+        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def update(**values) -> None:
+    """Save the given top-level keys, keeping every other setting."""
+    try:
+        data = load()
+        data.update(values)
+        write_text_atomic(SETTINGS_FILE, json.dumps(data, indent=2))
+    except Exception as e:
+        print(f"[Settings] Failed to save {', '.join(values)}: {e}")
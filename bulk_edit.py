@@ -0,0 +1,353 @@
+# bulk_edit.py
+"""Apply the same change to every catalogue entry matching a query.
+
+    python bulk_edit.py "model_type:=other" --set model_type=SDXL
+    python bulk_edit.py "source:civitai" --set source=CivitAI --category Styles
+    python bulk_edit.py "tag:blue" --rename-tag "blue hair=>blue_hair" --add-tag "Quality::masterpiece"
+    python bulk_edit.py --rollback 20260101-120000-ab12     # undo a run
+    python bulk_edit.py --resume 20260101-120000-ab12       # finish an interrupted run
+    python bulk_edit.py --journals                          # list runs
+
+Queries use the catalogue search syntax (see CatalogueIndex.search). Every run
+is journalled before anything is written: the journal holds each file's
+before/after text and is fsync'ed, then the files are replaced in parallel,
+each one atomically. An interrupted run can therefore be resumed or rolled
+back, and no JSON is ever left half-written.
+"""
+import os, sys, json, time, uuid, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from catalogue_index import CatalogueIndex, ALL_CATEGORY, entry_text, write_text_atomic, read_text, display_name
+
+JOURNAL_DIR_NAME = ".bulk_edit_journal"
+EDITABLE_FIELDS = ("name", "file_name", "source", "model_type", "notes", "image_path")
+
+STATE_APPLYING = "applying"
+STATE_COMMITTED = "committed"
+STATE_ROLLED_BACK = "rolled_back"
+
+
+class BulkEditError(Exception):
+    pass
+
+
+# ===== Operations =====
+
+def parse_ops(sets=(), add_tags=(), remove_tags=(), rename_tags=()):
+    """CLI strings -> list of (op, args) tuples; raises BulkEditError on bad input."""
+    ops = []
+    for item in sets:
+        field, sep, value = item.partition("=")
+        field = field.strip()
+        if not sep or field not in EDITABLE_FIELDS:
+            raise BulkEditError(f"--set expects FIELD=VALUE with FIELD one of {', '.join(EDITABLE_FIELDS)}: {item!r}")
+        ops.append(("set", field, value))
+    for item in add_tags:
+        label, sep, value = item.partition("::")
+        if not sep:
+            label, value = "", item
+        if not value.strip():
+            raise BulkEditError(f"--add-tag needs a value: {item!r}")
+        ops.append(("add_tag", label.strip(), value.strip()))
+    for item in remove_tags:
+        ops.append(("remove_tag", item.strip()))
+    for item in rename_tags:
+        old, sep, new = item.partition("=>")
+        if not sep or not old.strip() or not new.strip():
+            raise BulkEditError(f"--rename-tag expects OLD=>NEW: {item!r}")
+        ops.append(("rename_tag", old.strip(), new.strip()))
+    if not ops:
+        raise BulkEditError("nothing to do: give at least one --set/--add-tag/--remove-tag/--rename-tag")
+    return ops
+
+
+def _tag_value(tag):
+    return str((tag.get("value") if isinstance(tag, dict) else tag) or "").strip()
+
+
+def apply_ops(data: dict, ops) -> dict:
+    """Return a changed copy of an entry (the input dict is left alone)."""
+    out = dict(data)
+    # plain-string tags are kept as they are unless an op actually changes them
+    tags = [dict(t) if isinstance(t, dict) else t for t in (data.get("tags") or [])]
+    for op in ops:
+        kind = op[0]
+        if kind == "set":
+            out[op[1]] = op[2]
+        elif kind == "add_tag":
+            _, label, value = op
+            if not any(_tag_value(t).lower() == value.lower() for t in tags):
+                tags.append({"label": label, "value": value})
+        elif kind == "remove_tag":
+            tags = [t for t in tags if _tag_value(t).lower() != op[1].lower()]
+        elif kind == "rename_tag":
+            _, old, new = op
+            for i, t in enumerate(tags):
+                if _tag_value(t).lower() == old.lower():
+                    if isinstance(t, dict):
+                        t["value"] = new
+                    else:
+                        tags[i] = {"label": "", "value": new}
+    if tags or "tags" in data:
+        out["tags"] = tags
+    return out
+
+
+# ===== Journal =====
+
+def journal_dir(base_dir: str) -> str:
+    return os.path.join(base_dir, JOURNAL_DIR_NAME)
+
+
+def _paths(base_dir, txid):
+    d = journal_dir(base_dir)
+    return os.path.join(d, f"{txid}.jsonl"), os.path.join(d, f"{txid}.state")
+
+
+def _set_state(base_dir, txid, state):
+    write_text_atomic(_paths(base_dir, txid)[1], state)
+
+
+def _get_state(base_dir, txid):
+    try:
+        with open(_paths(base_dir, txid)[1], "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise BulkEditError(f"no journal for run {txid!r}")
+
+
+def _read_journal(base_dir, txid):
+    path = _paths(base_dir, txid)[0]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            records = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        raise BulkEditError(f"no journal for run {txid!r}")
+    return header, records
+
+
+def list_journals(base_dir):
+    """-> [(txid, state, header)] newest first."""
+    d = journal_dir(base_dir)
+    if not os.path.isdir(d):
+        return []
+    out = []
+    for fn in sorted(os.listdir(d), reverse=True):
+        if not fn.endswith(".jsonl"):
+            continue
+        txid = fn[:-len(".jsonl")]
+        try:
+            with open(os.path.join(d, fn), "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+            out.append((txid, _get_state(base_dir, txid), header))
+        except (OSError, ValueError, BulkEditError):
+            continue
+    return out
+
+
+def _write_journal(base_dir, txid, header, changes):
+    os.makedirs(journal_dir(base_dir), exist_ok=True)
+    path = _paths(base_dir, txid)[0]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for fpath, before, after in changes:
+            f.write(json.dumps({"path": fpath, "before": before, "after": after}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())  # the journal must be on disk before the first file is touched
+    _set_state(base_dir, txid, STATE_APPLYING)
+
+
+# ===== Running =====
+
+def _write_all(items, workers):
+    """items: [(path, text)] -> list of (path, error) for failures."""
+    def write(item):
+        try:
+            write_text_atomic(*item)
+            return None
+        except Exception as e:
+            return e
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (fpath, _), err in zip(items, pool.map(write, items, chunksize=64)):
+            if err:
+                failed.append((fpath, err))
+    return failed
+
+
+def plan(index: CatalogueIndex, query: str, ops, category: str = ALL_CATEGORY, workers: int = 16):
+    """-> [(path, before text, after text, entry)] for entries the ops would actually change."""
+    matches = [index.load_entry(s) for s in index.matching(query, index.entries_in(category))]
+    matches = [d for d in matches if d is not None]
+    # the journal needs each file's exact current text, so read them (in parallel)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        befores = list(pool.map(read_text, [d["full_path"] for d in matches], chunksize=64))
+
+    changes = []
+    for data, before in zip(matches, befores):
+        if before is None:
+            continue
+        edited = apply_ops(data, ops)
+        if edited != data:
+            changes.append((data["full_path"], before, entry_text(edited), data))
+    return changes
+
+
+def apply(base_dir: str, changes, query: str, ops, workers: int = 16):
+    """Journal then write `changes` from plan(); returns (txid, failures)."""
+    txid = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:4]
+    header = {"txid": txid, "created": time.time(), "query": query, "ops": ops, "count": len(changes)}
+    _write_journal(base_dir, txid, header, [(p, b, a) for p, b, a, _ in changes])
+    failed = _write_all([(p, a) for p, _, a, _ in changes], workers)
+    if not failed:
+        _set_state(base_dir, txid, STATE_COMMITTED)
+    return txid, failed
+
+
+def resume(base_dir: str, txid: str, workers: int = 16):
+    state = _get_state(base_dir, txid)
+    if state != STATE_APPLYING:
+        raise BulkEditError(f"run {txid} is {state}; nothing to resume")
+    _, records = _read_journal(base_dir, txid)
+    # Writing "after" again is idempotent, so files that already made it are simply rewritten
+    failed = _write_all([(r["path"], r["after"]) for r in records], workers)
+    if not failed:
+        _set_state(base_dir, txid, STATE_COMMITTED)
+    return len(records), failed
+
+
+def rollback(base_dir: str, txid: str, force: bool = False, workers: int = 16):
+    """Restore each file's "before" text -> (restored, skipped paths, failures)."""
+    state = _get_state(base_dir, txid)
+    if state == STATE_ROLLED_BACK:
+        raise BulkEditError(f"run {txid} was already rolled back")
+    _, records = _read_journal(base_dir, txid)
+
+    todo, skipped = [], []
+    for r in records:
+        try:
+            with open(r["path"], "r", encoding="utf-8") as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current == r["before"]:
+            continue  # never written (interrupted run) - nothing to undo
+        if current != r["after"] and not force:
+            skipped.append(r["path"])  # edited since the run; don't clobber it
+            continue
+        todo.append((r["path"], r["before"]))
+
+    failed = _write_all(todo, workers)
+    if not failed:
+        _set_state(base_dir, txid, STATE_ROLLED_BACK)
+    return len(todo) - len(failed), skipped, failed
+
+
+def _report_failures(failed, tag="[Bulk Edit]"):
+    for fpath, err in failed[:20]:
+        print(f"{tag} Failed to write '{fpath}': {err}")
+    if len(failed) > 20:
+        print(f"{tag} ... and {len(failed) - 20} more")
+
+
+def confirm_and_apply(base_dir: str, changes, query: str, ops, prompt: str, tag: str = "[Bulk Edit]",
+                      assume_yes: bool = False, workers: int = 16, cancel_message: str = "Cancelled.",
+                      cancel_code: int = 0) -> int:
+    """Command-line tail shared by the batch tools: ask, apply(), report -> exit code."""
+    if not assume_yes:
+        answer = input(f"{prompt} [y/N] ").strip().lower()
+        if answer not in ("y", "yes"):
+            print(f"{tag} {cancel_message}")
+            return cancel_code
+    t0 = time.perf_counter()
+    txid, failed = apply(base_dir, changes, query, ops, workers)
+    elapsed = time.perf_counter() - t0
+    _report_failures(failed, tag)
+    if failed:
+        print(f"{tag} {len(failed)} files failed; run {txid} left resumable: "
+              f"python bulk_edit.py --resume {txid} (or --rollback {txid})")
+        return 1
+    print(f"{tag} Run {txid}: wrote {len(changes)} files in {elapsed:.2f}s "
+          f"({len(changes) / max(elapsed, 1e-9):.0f} files/s); undo with: python bulk_edit.py --rollback {txid}")
+    return 0
+
+
+def main(argv=None):
+    from character_catalogue import CATEGORY_FOLDERS
+
+    parser = argparse.ArgumentParser(description="Bulk-edit catalogue entries matching a query")
+    parser.add_argument("query", nargs="?", default="", help='search query, e.g. "model_type:=other source:civitai"')
+    parser.add_argument("--category", default=ALL_CATEGORY, choices=[ALL_CATEGORY] + list(CATEGORY_FOLDERS))
+    parser.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE")
+    parser.add_argument("--add-tag", action="append", default=[], metavar="[LABEL::]VALUE")
+    parser.add_argument("--remove-tag", action="append", default=[], metavar="VALUE")
+    parser.add_argument("--rename-tag", action="append", default=[], metavar="OLD=>NEW")
+    parser.add_argument("--dry-run", action="store_true", help="show what would change; write nothing")
+    parser.add_argument("--yes", "-y", action="store_true", help="don't ask for confirmation")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--journals", action="store_true", help="list previous runs")
+    parser.add_argument("--resume", metavar="TXID", help="finish an interrupted run")
+    parser.add_argument("--rollback", metavar="TXID", help="undo a run")
+    parser.add_argument("--force", action="store_true", help="with --rollback: also restore files edited since")
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    workers = max(1, args.workers)
+    try:
+        if args.journals:
+            runs = list_journals(base_dir)
+            if not runs:
+                print("[Bulk Edit] No journalled runs.")
+            for txid, state, header in runs:
+                print(f"{txid}  {state:<11}  {header.get('count', '?'):>6} files  query={header.get('query')!r}")
+            return 0
+
+        if args.resume:
+            t0 = time.perf_counter()
+            n, failed = resume(base_dir, args.resume, workers)
+            _report_failures(failed)
+            print(f"[Bulk Edit] Resumed {args.resume}: {n - len(failed)}/{n} files in {time.perf_counter() - t0:.2f}s")
+            return 1 if failed else 0
+
+        if args.rollback:
+            t0 = time.perf_counter()
+            restored, skipped, failed = rollback(base_dir, args.rollback, args.force, workers)
+            _report_failures(failed)
+            for p in skipped[:20]:
+                print(f"[Bulk Edit] Skipped (changed since the run; use --force): {p}")
+            print(f"[Bulk Edit] Rolled back {args.rollback}: {restored} files restored, "
+                  f"{len(skipped)} skipped in {time.perf_counter() - t0:.2f}s")
+            return 1 if (failed or skipped) else 0
+
+        for txid, state, _ in list_journals(base_dir):
+            if state == STATE_APPLYING:
+                print(f"[Bulk Edit] Warning: run {txid} was interrupted; use --resume {txid} or --rollback {txid}")
+
+        ops = parse_ops(args.set, args.add_tag, args.remove_tag, args.rename_tag)
+        if not args.query.strip() and args.category == ALL_CATEGORY:
+            raise BulkEditError('a query is required (an empty query is only allowed with --category)')
+    except BulkEditError as e:
+        print(f"[Bulk Edit] {e}")
+        return 2
+
+    index = CatalogueIndex(base_dir, CATEGORY_FOLDERS, keep_entries=True)
+    t0 = time.perf_counter()
+    index.load()
+    changes = plan(index, args.query, ops, args.category, workers)
+    t_plan = time.perf_counter() - t0
+    print(f"[Bulk Edit] {len(changes)} entries would change (planned in {t_plan:.2f}s)")
+    for _, _, _, data in changes[:15]:
+        print(f"    {display_name(data)}  [{data['category']}]")
+    if len(changes) > 15:
+        print(f"    ... and {len(changes) - 15} more")
+    if not changes or args.dry_run:
+        return 0
+
+    return confirm_and_apply(base_dir, changes, args.query, ops, f"Apply to {len(changes)} files?",
+                             assume_yes=args.yes, workers=workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+# catalogue_archive.py
+"""Move a catalogue (or one category) between machines as a single archive.
+
+    python catalogue_archive.py export catalogue.tar
+    python catalogue_archive.py export styles.tar --category Styles --workers 8
+    python catalogue_archive.py import catalogue.tar --dry-run
+    python catalogue_archive.py import catalogue.tar --images-dir "D:/LoRA Images" --on-conflict overwrite
+
+The archive is a plain tar stream, written and read front to back:
+
+    catalogue.json                 header (format, version, category, entry count)
+    images/<sha256>/<name>[.gz]    each referenced image once, whatever its original path
+    paths/<n>.json                 original image_path -> images/... member, for chunk n
+    entries/<n>.jsonl.gz           chunk n of entries: {"category", "file", "data"} per line
+
+Every image a chunk needs comes before that chunk, so import never has to look
+back. Reading, hashing and compressing happen on a worker pool with a bounded
+number of jobs in flight; only the tar writer/reader is sequential. JPEG, PNG,
+WEBP and GIF images are stored as-is (they don't shrink), anything else is
+gzipped when that helps.
+
+Import places images in the local image store (or --images-dir), rewrites
+`image_path` / `extra_images[].image_path` to the new location and merges with
+entries already present: by default existing values win and blanks, missing
+tags and missing extra images are filled in from the archive.
+"""
+import os, re, sys, json, time, gzip, hashlib, tarfile, argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from catalogue_index import CatalogueIndex, ALL_CATEGORY, RUNTIME_KEYS, save_entry, write_bytes_atomic, image_paths
+from image_store import APP_DIR, STORE_DIR_NAME, resolve as resolve_image_path
+
+ARCHIVE_FORMAT = "lora-catalogue-archive"
+ARCHIVE_VERSION = 1
+HEADER_NAME = "catalogue.json"
+ENTRY_CHUNK = 256
+COMPRESS_LEVEL = 6
+STORED_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif")  # already compressed
+CONFLICT_MODES = ("merge", "skip", "overwrite")
+
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+_UNSAFE_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _safe_name(name: str) -> str:
+    return _UNSAFE_RE.sub("_", name).strip(" .")
+
+
+def _rewrite(data: dict, paths: dict) -> dict:
+    """Copy of an entry with image paths mapped through `paths` (unknown paths are kept)."""
+    edited = dict(data)
+    path = str(data.get("image_path") or "").strip()
+    if path in paths:
+        edited["image_path"] = paths[path]
+    if isinstance(data.get("extra_images"), list):
+        extras = []
+        for item in data["extra_images"]:
+            if isinstance(item, dict) and str(item.get("image_path") or "").strip() in paths:
+                item = dict(item, image_path=paths[item["image_path"].strip()])
+            extras.append(item)
+        edited["extra_images"] = extras
+    return edited
+
+
+def _ordered(pool, fn, jobs, ahead):
+    """pool.map over a lazy job stream with at most `ahead` jobs in flight -> (job, result) in order."""
+    pending = deque()
+    for job in jobs:
+        pending.append((job, pool.submit(fn, job)))
+        if len(pending) >= ahead:
+            job, future = pending.popleft()
+            yield job, future.result()
+    while pending:
+        job, future = pending.popleft()
+        yield job, future.result()
+
+
+def _add(tar, name: str, payload: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(payload)
+    info.mtime = int(time.time())
+    tar.addfile(info, BytesIO(payload))
+
+
+# ===== Export =====
+
+def _pack_image(path: str, base_dir: str, level: int):
+    """-> (sha256, member file name, payload, original size), or None if the image can't be read."""
+    try:
+        with open(resolve_image_path(path, base_dir), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    name = _safe_name(os.path.basename(path.replace("\\", "/"))) or "image.png"
+    if not name.lower().endswith(STORED_EXTS):
+        packed = gzip.compress(data, level, mtime=0)
+        if len(packed) < len(data):
+            return digest, name + ".gz", packed, len(data)
+    return digest, name, data, len(data)
+
+
+def _pack_entries(entries, level: int):
+    """-> (gzipped JSON lines, uncompressed size)."""
+    lines = []
+    for data in entries:
+        record = {
+            "category": data.get("category"),
+            "file": os.path.basename(data["full_path"]),
+            "data": {k: v for k, v in data.items() if k not in RUNTIME_KEYS},
+        }
+        lines.append(json.dumps(record, ensure_ascii=False))
+    raw = ("\n".join(lines) + "\n").encode("utf-8")
+    return gzip.compress(raw, level, mtime=0), len(raw)
+
+
+def export_archive(index: CatalogueIndex, out_path: str, category: str = ALL_CATEGORY,
+                   workers: int = 8, level: int = COMPRESS_LEVEL):
+    """Stream entries of `category` and their images into out_path -> stats."""
+    summaries = index.entries_in(category)  # each copy is exported into its own folder
+    stats = {"entries": 0, "images": 0, "deduped": 0, "missing": [], "bytes_in": 0, "bytes_out": 0}
+    t0 = time.perf_counter()
+
+    def run(job):
+        if job[0] == "image":
+            return _pack_image(job[1], index.base_dir, level)
+        return _pack_entries(job[2], level)
+
+    header = {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "category": category, "entries": len(summaries)}
+    members = {}      # sha256 -> images/... member already written
+    chunk_paths = {}  # image paths first seen in the current chunk -> member
+    tmp = out_path + ".part"
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def jobs():
+            queued = set()
+            for n, start in enumerate(range(0, len(summaries), ENTRY_CHUNK)):
+                entries = [d for d in pool.map(index.load_entry, summaries[start:start + ENTRY_CHUNK]) if d is not None]
+                for path in (p for d in entries for p in image_paths(d)):
+                    if path not in queued:
+                        queued.add(path)
+                        yield ("image", path)
+                yield ("entries", n, entries)
+
+        with open(tmp, "wb") as f, tarfile.open(fileobj=f, mode="w|") as tar:
+            _add(tar, HEADER_NAME, json.dumps(header, indent=2).encode("utf-8"))
+            for job, result in _ordered(pool, run, jobs(), workers * 2):
+                if job[0] == "image":
+                    if result is None:
+                        stats["missing"].append(job[1])
+                        continue
+                    digest, name, payload, size = result
+                    member = members.get(digest)
+                    if member is None:
+                        member = f"images/{digest}/{name}"
+                        _add(tar, member, payload)
+                        members[digest] = member
+                        stats["images"] += 1
+                        stats["bytes_in"] += size
+                    else:
+                        stats["deduped"] += 1
+                    chunk_paths[job[1]] = member
+                    continue
+                _, n, entries = job
+                payload, size = result
+                if chunk_paths:
+                    _add(tar, f"paths/{n:05d}.json", json.dumps(chunk_paths, ensure_ascii=False).encode("utf-8"))
+                    chunk_paths = {}
+                _add(tar, f"entries/{n:05d}.jsonl.gz", payload)
+                stats["entries"] += len(entries)
+                stats["bytes_in"] += size
+    os.replace(tmp, out_path)
+    stats["bytes_out"] = os.path.getsize(out_path)
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+# ===== Import =====
+
+def _is_blank(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def merge_entry(existing: dict, incoming: dict, base_dir: str = APP_DIR) -> dict:
+    """Existing values win; blanks are filled in and missing tags / extra images appended."""
+    merged = dict(existing)
+    for key, value in incoming.items():
+        if key in ("tags", "extra_images") or _is_blank(value):
+            continue
+        current = merged.get(key)
+        if _is_blank(current) or (key == "model_type" and current == "Other"):
+            merged[key] = value
+    # an image that doesn't exist on this machine is replaced by the imported one
+    current = str(existing.get("image_path") or "").strip()
+    if current and incoming.get("image_path") and not os.path.exists(resolve_image_path(current, base_dir)):
+        merged["image_path"] = incoming["image_path"]
+
+    tags = list(existing.get("tags") or []) if isinstance(existing.get("tags"), list) else []
+    values = {str((t.get("value") if isinstance(t, dict) else t) or "").strip().lower() for t in tags}
+    for tag in incoming.get("tags") or []:
+        value = str((tag.get("value") if isinstance(tag, dict) else tag) or "").strip().lower()
+        if value and value not in values:
+            tags.append(tag)
+            values.add(value)
+    if tags or "tags" in existing:
+        merged["tags"] = tags
+
+    extras = list(existing.get("extra_images") or []) if isinstance(existing.get("extra_images"), list) else []
+    known = {str(i.get("image_path") or "").strip() for i in extras if isinstance(i, dict)}
+    for item in incoming.get("extra_images") or []:
+        if isinstance(item, dict) and str(item.get("image_path") or "").strip() not in known:
+            extras.append(item)
+            known.add(str(item.get("image_path") or "").strip())
+    if extras or "extra_images" in existing:
+        merged["extra_images"] = extras
+    return merged
+
+
+def _image_target(member: str, base_dir: str, images_dir):
+    """images/<sha256>/<name>[.gz] -> (new image_path, file to write, gzipped?)."""
+    parts = member.split("/")
+    if len(parts) != 3 or not _DIGEST_RE.fullmatch(parts[1]):
+        raise ArchiveError(f"unexpected image member {member!r}")
+    digest, name = parts[1], parts[2]
+    packed = name.endswith(".gz")
+    name = _safe_name(name[:-3] if packed else name) or "image.png"
+    stem, ext = os.path.splitext(name)
+    if images_dir is None:
+        ref = f"{STORE_DIR_NAME}/{digest[:2]}/{digest}{ext.lower() or '.png'}"
+        return ref, resolve_image_path(ref, base_dir), packed
+    # the hash suffix keeps same-named images apart and makes a re-import reuse the files
+    fpath = os.path.join(images_dir, f"{stem}-{digest[:8]}{ext}")
+    return fpath, fpath, packed
+
+
+def import_archive(archive_path: str, base_dir: str, folders: dict, images_dir=None,
+                   on_conflict: str = "merge", workers: int = 8, dry_run: bool = False):
+    """Stream-extract an archive into the catalogue -> stats."""
+    stats = {"entries": 0, "added": 0, "merged": 0, "replaced": 0, "unchanged": 0, "skipped": 0,
+             "unknown_category": 0, "images": 0, "images_present": 0, "errors": [],
+             "bytes_in": os.path.getsize(archive_path), "bytes_out": 0}
+    t0 = time.perf_counter()
+    targets = {}  # images/... member -> new image_path
+    paths = {}    # original image_path -> new image_path
+
+    def place_image(fpath, payload, packed):
+        if os.path.exists(fpath):
+            return 0
+        if packed:
+            payload = gzip.decompress(payload)
+        if not dry_run:
+            os.makedirs(os.path.dirname(fpath), exist_ok=True)
+            write_bytes_atomic(fpath, payload)
+        return len(payload)
+
+    def import_record(rec):
+        folder = folders.get(rec.get("category"))
+        if folder is None:
+            return "unknown_category"
+        fname = _safe_name(os.path.basename(str(rec.get("file") or "").replace("\\", "/")))
+        if not fname.lower().endswith(".json") or not isinstance(rec.get("data"), dict):
+            return "skipped"
+        data = _rewrite(rec["data"], paths)
+        fpath = os.path.join(base_dir, folder, fname)
+        try:
+            with open(fpath, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except FileNotFoundError:
+            existing = None
+        if existing is None:
+            outcome, result = "added", data
+        elif not isinstance(existing, dict) or on_conflict == "skip":
+            return "skipped"  # never clobber a file we can't merge with
+        elif on_conflict == "overwrite":
+            outcome, result = "replaced", data
+        else:
+            outcome, result = "merged", merge_entry(existing, data, base_dir)
+        if result == existing:
+            return "unchanged"
+        if not dry_run:
+            os.makedirs(os.path.dirname(fpath), exist_ok=True)
+            save_entry(fpath, result)
+        return outcome
+
+    def run(job):
+        if job[0] == "image":
+            return place_image(*job[1:])
+        raw = gzip.decompress(job[1])
+        outcomes = []
+        for line in raw.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                outcomes.append(("error", f"Unreadable entry record: {e}"))
+                continue
+            if not isinstance(rec, dict):
+                outcomes.append(("skipped", None))
+                continue
+            try:
+                outcomes.append((import_record(rec), None))
+            except Exception as e:
+                outcomes.append(("error", f"{rec.get('category')}/{rec.get('file')}: {e}"))
+        return outcomes
+
+    with open(archive_path, "rb") as f, tarfile.open(fileobj=f, mode="r|") as tar, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        def jobs():
+            header = None
+            for member in tar:
+                if not member.isfile():
+                    continue
+                payload = tar.extractfile(member).read()
+                name = member.name
+                if header is None:
+                    header = json.loads(payload) if name == HEADER_NAME else {}
+                    if header.get("format") != ARCHIVE_FORMAT:
+                        raise ArchiveError(f"{archive_path} is not a catalogue archive")
+                    if header.get("version", 0) > ARCHIVE_VERSION:
+                        raise ArchiveError(f"archive version {header['version']} is newer than this app supports")
+                    continue
+                if name.startswith("images/"):
+                    new_path, fpath, packed = _image_target(name, base_dir, images_dir)
+                    targets[name] = new_path
+                    yield ("image", fpath, payload, packed)
+                elif name.startswith("paths/"):
+                    for old, ref in json.loads(payload).items():
+                        if ref in targets:
+                            paths[old] = targets[ref]
+                elif name.startswith("entries/"):
+                    yield ("entries", payload)
+
+        for job, result in _ordered(pool, run, jobs(), workers * 2):
+            if job[0] == "image":
+                stats["images" if result else "images_present"] += 1
+                stats["bytes_out"] += result
+                continue
+            for outcome, error in result:
+                stats["entries"] += 1
+                if error:
+                    stats["errors"].append(error)
+                else:
+                    stats[outcome] += 1
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+def _rate(stats):
+    secs = max(stats["seconds"], 1e-9)
+    return (f"{stats['seconds']:.2f}s: {stats['entries'] / secs:.0f} entries/s, "
+            f"{stats['bytes_in'] / secs / (1024 * 1024):.1f} MB/s in, {stats['bytes_out'] / secs / (1024 * 1024):.1f} MB/s out")
+
+
+def main(argv=None):
+    from character_catalogue import CATEGORY_FOLDERS
+
+    parser = argparse.ArgumentParser(description="Export / import the catalogue as a single archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write entries and their images to an archive")
+    exp.add_argument("archive")
+    exp.add_argument("--category", default=ALL_CATEGORY, choices=[ALL_CATEGORY] + list(CATEGORY_FOLDERS))
+    exp.add_argument("--level", type=int, default=COMPRESS_LEVEL, choices=range(1, 10), metavar="1-9",
+                     help="gzip level for entries and uncompressed images")
+    exp.add_argument("--workers", type=int, default=8)
+    imp = sub.add_parser("import", help="extract an archive into this catalogue")
+    imp.add_argument("archive")
+    imp.add_argument("--images-dir", help="put images in this folder instead of the local image store")
+    imp.add_argument("--on-conflict", choices=CONFLICT_MODES, default="merge",
+                     help="entry already exists: fill in its blanks (merge), leave it, or replace it")
+    imp.add_argument("--dry-run", action="store_true", help="report what would change; write nothing")
+    imp.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+    workers = max(1, args.workers)
+
+    if args.command == "export":
+        index = CatalogueIndex(APP_DIR, CATEGORY_FOLDERS)
+        load = index.load(workers)
+        print(f"[Archive] {load['files']} entries loaded in {load['seconds']:.2f}s")
+        stats = export_archive(index, args.archive, args.category, workers, args.level)
+        mb = lambda b: b / (1024 * 1024)
+        print(f"[Archive] Exported {stats['entries']} entries and {stats['images']} images "
+              f"({stats['deduped']} duplicate references shared) to {args.archive}")
+        print(f"[Archive] {mb(stats['bytes_in']):.1f} MB -> {mb(stats['bytes_out']):.1f} MB in {_rate(stats)}")
+        for p in stats["missing"][:10]:
+            print(f"    Unreadable image: {p}")
+        if len(stats["missing"]) > 10:
+            print(f"    ... and {len(stats['missing']) - 10} more")
+        return 0
+
+    if not os.path.isfile(args.archive):
+        print(f"[Archive] No such file: {args.archive}")
+        return 2
+    images_dir = os.path.abspath(args.images_dir) if args.images_dir else None
+    try:
+        stats = import_archive(args.archive, APP_DIR, CATEGORY_FOLDERS, images_dir,
+                               args.on_conflict, workers, args.dry_run)
+    except (ArchiveError, tarfile.TarError, ValueError) as e:
+        print(f"[Archive] Import failed: {e}")
+        return 1
+    prefix = "[Archive] (dry run) " if args.dry_run else "[Archive] "
+    print(f"{prefix}{stats['entries']} entries: {stats['added']} added, {stats['merged']} merged, "
+          f"{stats['replaced']} replaced, {stats['unchanged']} unchanged, {stats['skipped']} skipped, "
+          f"{stats['unknown_category']} in unknown categories, {len(stats['errors'])} failed")
+    written = "would be written" if args.dry_run else "written"
+    print(f"{prefix}{stats['images']} images {written}, {stats['images_present']} already present; {_rate(stats)}")
+    for err in stats["errors"][:10]:
+        print(f"    {err}")
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# catalogue_bench.py
+"""Measurements for the catalogue index on a synthetic catalogue.
+
+    python catalogue_bench.py memory --entries 100000
+    python catalogue_bench.py load --dir "//nas/share/LoRA Catalogue" --workers 1 8 16
+
+`memory` compares the list's *data*: one fully parsed dict per entry (the old
+refresh_list layout) against the compact EntrySummary records, timestamp
+arrays and sort permutation the index now holds, plus the row list. The
+per-button closure cost is reported separately since both layouts pay it.
+Widgets are not measured (this runs without a display): in List view each row
+is also a CTkButton, which costs far more than its data; Grid view only keeps
+the tiles on screen.
+
+`load` times a full index load per worker count and reports files/sec and
+how soon the first batch of rows is ready. Point --dir at an existing
+catalogue folder (the app folder itself, or a copy on a network share) to
+compare storage; for a cold-cache figure run it right after a reboot or sync.
+"""
+import os, json, gc, time, shutil, tempfile, tracemalloc, argparse, random
+
+from catalogue_index import CatalogueIndex, LOAD_WORKERS
+
+BENCH_FOLDERS = {"Characters": "Character JSONs", "Styles": "Style JSONs", "Misc": "Misc JSONs"}
+
+
+def make_catalogue(base_dir, n_entries, seed=1):
+    """Write n_entries realistic-looking JSONs spread over the three folders."""
+    rnd = random.Random(seed)
+    folders = list(BENCH_FOLDERS.values())
+    for folder in folders:
+        os.makedirs(os.path.join(base_dir, folder), exist_ok=True)
+    words = ["masterpiece", "best quality", "1girl", "solo", "looking at viewer", "outdoors",
+             "camo", "gritty", "arms crossed", "smile", "long hair", "blue eyes"]
+    for i in range(n_entries):
+        data = {
+            "name": f"Example LoRA {i}",
+            "file_name": f"example_lora_{i}.safetensors",
+            "source": rnd.choice(["CivitAI", "HuggingFace", "Other"]),
+            "model_type": rnd.choice(["Illustrious", "SDXL", "Pony", "SD 1.5"]),
+            "tags": [{"label": f"Tag {t}", "value": ", ".join(rnd.sample(words, 4))} for t in range(rnd.randint(1, 6))],
+            "notes": "Looks good at 0.65 weight. " * rnd.randint(2, 12),
+            "image_path": f"D:/Images/lora_{i}_main.png",
+            "extra_images": [{"title": f"Shot {k}", "image_path": f"D:/Images/lora_{i}_{k}.png"}
+                             for k in range(rnd.randint(0, 5))],
+        }
+        folder = folders[i % len(folders)]
+        with open(os.path.join(base_dir, folder, f"Example LoRA {i}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, current, elapsed
+
+
+def bench_memory(base_dir):
+    def full_dicts():
+        # what refresh_list used to keep in self.entries: (path, parsed dict) per entry
+        entries = []
+        for folder in BENCH_FOLDERS.values():
+            folder_path = os.path.join(base_dir, folder)
+            for fname in sorted(os.listdir(folder_path), key=str.lower):
+                fpath = os.path.join(folder_path, fname)
+                with open(fpath, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                data["full_path"] = fpath
+                entries.append((fpath, data))
+        return entries
+
+    def summaries():
+        index = CatalogueIndex(base_dir, BENCH_FOLDERS)
+        index.load()
+        rows = index.view("All")  # builds the cached sort permutation and merged view
+        return index, rows        # rows = what CharacterCatalogue.entries holds
+
+    def closures(items):
+        # one button command per row, as both layouts create
+        return lambda: [lambda d=d, i=i: (d, i) for i, d in enumerate(items)]
+
+    old, old_bytes, old_secs = _measure(full_dicts)
+    n = len(old)
+    _, cmd_bytes, _ = _measure(closures(old))
+    del old
+    _, new_bytes, new_secs = _measure(summaries)
+
+    mb = lambda b: b / (1024 * 1024)
+    row = lambda label, b: print(f"{label:<24}: {mb(b):8.1f} MB  ({b / n:6.0f} B/entry)")
+    print(f"entries: {n}")
+    row("full dicts + rows", old_bytes)
+    row("summary index + rows", new_bytes)
+    row("button closures", cmd_bytes)
+    print(f"index data reduction    : {old_bytes / max(new_bytes, 1):.1f}x")
+    print(f"incl. closures          : {(old_bytes + cmd_bytes) / max(new_bytes + cmd_bytes, 1):.1f}x")
+    print("(widgets not measured: one CTkButton per row in List view comes on top of both)")
+    print(f"load time (traced)      : dicts {old_secs:.2f}s, index {new_secs:.2f}s")
+
+
+def bench_load(base_dir, worker_counts):
+    for workers in worker_counts:
+        index = CatalogueIndex(base_dir, BENCH_FOLDERS)
+        t0 = time.perf_counter()
+        first = None
+        files = 0
+        index.begin_load()
+        for batch in index.scan(workers):
+            if first is None:
+                first = time.perf_counter() - t0
+            index.add_loaded(batch)
+            files += len(batch)
+        index.finish_load()
+        elapsed = time.perf_counter() - t0
+        print(f"workers={workers:<3} {files} files in {elapsed:.2f}s: {files / max(elapsed, 1e-9):8.0f} files/s, "
+              f"first batch after {(first or 0) * 1000:.0f} ms, {len(index.invalid)} invalid")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catalogue index measurements")
+    parser.add_argument("what", choices=("memory", "load"))
+    parser.add_argument("--entries", type=int, default=100000, help="synthetic catalogue size")
+    parser.add_argument("--dir", help="use/keep this folder instead of a temporary one")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, LOAD_WORKERS], help="load: worker counts to compare")
+    args = parser.parse_args(argv)
+
+    base_dir = args.dir or tempfile.mkdtemp(prefix="lora_bench_")
+    try:
+        if not os.path.isdir(os.path.join(base_dir, BENCH_FOLDERS["Characters"])):
+            t0 = time.perf_counter()
+            make_catalogue(base_dir, args.entries)
+            print(f"[Bench] wrote {args.entries} entries to {base_dir} in {time.perf_counter() - t0:.1f}s")
+        if args.what == "memory":
+            bench_memory(base_dir)
+        else:
+            bench_load(base_dir, args.workers)
+    finally:
+        if not args.dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
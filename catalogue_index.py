@@ -0,0 +1,674 @@
+# catalogue_index.py
+import os, json, re, time, tempfile, sys, threading
+from array import array
+from bisect import insort
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Pseudo-category shown in the catalogue dropdown; it has no folder of its own
+ALL_CATEGORY = "All"
+
+# Cold loads: files are read/parsed by a worker pool in chunks of LOAD_CHUNK files
+LOAD_WORKERS = 8
+LOAD_CHUNK = 64
+
+# UI label -> sort key understood by CatalogueIndex.view()/groups()
+SORT_KEYS = {
+    "Name": "name",
+    "Model Type": "model_type",
+    "Source": "source",
+    "Date Added": "added",
+    "Date Modified": "modified",
+    "Tags": "tags",
+    "Images": "images",
+}
+
+# Grouping can use any sort key, plus the folder an entry came from
+GROUP_KEYS = {"None": None, "Category": "category", **SORT_KEYS}
+
+# Keys the index attaches to loaded entries; never written back to the JSON files
+RUNTIME_KEYS = ("full_path", "category", "also_in")
+
+# Fields a "field:value" search term can target (see CatalogueIndex.search)
+SEARCH_FIELDS = ("name", "file_name", "source", "model_type", "category", "tag", "notes")
+
+_NUM_RE = re.compile(r"(\d+)")
+
+
+def natural_key(text: str):
+    """'LoRA 10' sorts after 'LoRA 9': digit runs compare as numbers, the rest case-insensitively."""
+    return tuple(int(p) if i % 2 else p.casefold() for i, p in enumerate(_NUM_RE.split(text or "")))
+
+
+def display_name(data) -> str:
+    if isinstance(data, EntrySummary):
+        return data.name
+    # names are shown and sorted as text, whatever the JSON holds (e.g. "name": 5)
+    return _text(data.get("name")) or os.path.splitext(os.path.basename(data["full_path"]))[0]
+
+
+def _image_count(data: dict) -> int:
+    extras = data.get("extra_images") or []
+    return (1 if data.get("image_path") else 0) + len(extras)
+
+
+def _tag_texts(data: dict):
+    for tag in data.get("tags") or []:
+        # Expect {"label": "...", "value": "..."}; tolerate strings just in case
+        if isinstance(tag, dict):
+            yield str(tag.get("label") or "")
+            yield str(tag.get("value") or "")
+        else:
+            yield str(tag)
+
+
+def _query_terms(query: str):
+    # -> [(field or None, lower-case value, exact?)]; see CatalogueIndex.search()
+    terms = []
+    for raw in re.findall(r'(?:[^\s"]+:=?)?"[^"]*"|\S+', query or ""):
+        field, sep, value = raw.partition(":")
+        if not sep or field.lower() not in SEARCH_FIELDS:
+            field, value = None, raw
+        exact = bool(field) and value.startswith("=")
+        if exact:
+            value = value[1:]
+        terms.append((field and field.lower(), value.strip('"').lower(), exact))
+    return terms
+
+
+def _text(value) -> str:
+    return str(value or "")
+
+
+class EntrySummary:
+    """The few fields the list, sorting, grouping and de-duplication need.
+
+    Everything else (notes, tags, image paths) stays on disk until the entry is
+    selected. Repeated short values (folder, model type, source, category) are
+    interned so 100k summaries share one string per distinct value; the path is
+    rebuilt from folder + file name, and the name is only stored when it differs
+    from the JSON file name (it usually doesn't). Timestamps live in the index.
+    """
+
+    __slots__ = ("folder", "fname", "category", "_name", "file_name", "model_type", "source",
+                 "n_tags", "n_images", "also_in")
+
+    def __init__(self, path, category, data):
+        folder, self.fname = os.path.split(path)
+        self.folder = sys.intern(folder)
+        self.category = sys.intern(category)
+        name = display_name(data)
+        self._name = None if name == os.path.splitext(self.fname)[0] else name
+        self.file_name = _text(data.get("file_name"))
+        self.model_type = sys.intern(_text(data.get("model_type")))
+        self.source = sys.intern(_text(data.get("source")))
+        self.n_tags = len(data.get("tags") or [])
+        self.n_images = _image_count(data)
+        self.also_in = ()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.folder, self.fname)
+
+    @property
+    def name(self) -> str:
+        return self._name if self._name is not None else os.path.splitext(self.fname)[0]
+
+
+def entry_text(data: dict) -> str:
+    """The on-disk form of an entry (same layout as AddEditCharacter.save_character)."""
+    return json.dumps({k: v for k, v in data.items() if k not in RUNTIME_KEYS}, indent=4)
+
+
+def _write_atomic(fpath: str, payload, mode: str, encoding=None) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fpath) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            f.write(payload)
+        os.replace(tmp, fpath)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_text_atomic(fpath: str, text: str) -> None:
+    """Write via a temp file + rename, so a crash never leaves half a JSON behind."""
+    _write_atomic(fpath, text, "w", "utf-8")
+
+
+def write_bytes_atomic(fpath: str, payload: bytes) -> None:
+    """write_text_atomic() for binary files (images)."""
+    _write_atomic(fpath, payload, "wb")
+
+
+def read_text(fpath: str):
+    """A file's exact text (e.g. the "before" of a journalled edit), or None if it can't be read."""
+    try:
+        with open(fpath, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def image_paths(data: dict):
+    """An entry's main image path followed by its extra images' paths (blanks skipped)."""
+    paths = [str(data.get("image_path") or "").strip()]
+    for item in data.get("extra_images") or []:
+        if isinstance(item, dict):
+            paths.append(str(item.get("image_path") or "").strip())
+    return [p for p in paths if p]
+
+
+def files_by_name(roots, exts=None):
+    """File name (lower-case) -> path for every file under roots, optionally only `exts` (first one wins)."""
+    found = {}
+    for root in roots:
+        for dirpath, _, files in os.walk(root):
+            for fn in files:
+                if exts is None or fn.lower().endswith(exts):
+                    found.setdefault(fn.lower(), os.path.join(dirpath, fn))
+    return found
+
+
+def save_entry(fpath: str, data: dict) -> None:
+    write_text_atomic(fpath, entry_text(data))
+
+
+def _read_entry(fpath: str) -> dict:
+    with open(fpath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_file(category: str, fpath: str):
+    """Read one entry -> (data, summary, stat); raises on unreadable/invalid JSON."""
+    data = _read_entry(fpath)
+    if not isinstance(data, dict):
+        raise ValueError("top-level JSON value is not an object")
+    st = os.stat(fpath)
+    # attach full path (for delete) and the folder it came from
+    data["full_path"] = fpath
+    data["category"] = category
+    return data, EntrySummary(fpath, category, data), st
+
+
+def _json_files(folder: str):
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(folder, n) for n in sorted((n for n in names if n.lower().endswith(".json")), key=str.lower)]
+
+
+def _load_chunk(category: str, fpaths, keep_entries: bool):
+    """Read a run of files from one folder -> [(category, path, summary, data, ctime, mtime)].
+
+    summary is None for unreadable/invalid files; data is None unless keep_entries.
+    """
+    out = []
+    for fpath in fpaths:
+        try:
+            data, summary, st = _load_file(category, fpath)
+        except Exception:
+            out.append((category, fpath, None, None, 0.0, 0.0))
+            continue
+        out.append((category, fpath, summary, data if keep_entries else None, st.st_ctime, st.st_mtime))
+    return out
+
+
+def _load_stats(files: int, seconds: float) -> dict:
+    return {"files": files, "seconds": seconds, "files_per_sec": files / max(seconds, 1e-9)}
+
+
+# Marks a LoRA file name shared by several entries of one category (e.g. a multi-character pack)
+_AMBIGUOUS = object()
+
+
+class CatalogueIndex:
+    """In-memory index of every category folder.
+
+    `load()` reads all folders with a worker pool; afterwards `view(category)` is a
+    pure in-memory filter, including the merged "All" view.
+
+    The index holds compact EntrySummary records. The full entry dict is fetched
+    with `load_entry()`: from memory when built with keep_entries=True (the
+    server and command-line tools), otherwise from disk through a small LRU.
+
+    Entries live in fixed slots (a deleted entry leaves a None behind) so that
+    the sort permutations cached per key stay valid across `add()`/`remove()`,
+    which update them with a binary-search insert/delete instead of re-sorting.
+    """
+
+    def __init__(self, base_dir: str, folders: dict, keep_entries: bool = False, entry_cache_size: int = 256):
+        self.base_dir = base_dir
+        self.folders = dict(folders)   # category -> folder name
+        self.keep_entries = keep_entries
+        self.entries = []              # slot -> EntrySummary (None once removed)
+        self.invalid = []              # list of (category, filepath)
+        self.loaded = False
+        self.version = 0               # bumped on every load/add/remove
+
+        self._full = {}                # path -> entry dict (keep_entries only)
+        self._entry_cache = OrderedDict()
+        self._entry_cache_size = entry_cache_size
+        self._entry_lock = threading.Lock()
+
+        self._slots = {}               # folder -> {JSON file name -> slot}
+        self._count = 0
+        self._ctimes = array("d")      # slot -> ctime / mtime (no float object per entry)
+        self._mtimes = array("d")
+        self._perms = {}               # sort key -> array of live slots, ascending
+        self._merged = bytearray()     # slot -> 1 if shown in the "All" view
+        self._merged_version = -1
+        self._by_file_name = {}
+        self._by_file_name_version = -1
+        self._haystacks = {}           # slot -> lower-cased search fields (filled by search())
+
+    def folder_for(self, category: str) -> str:
+        return os.path.join(self.base_dir, self.folders[category])
+
+    def __len__(self):
+        return self._count
+
+    def _slot_of(self, fpath: str):
+        folder, fname = os.path.split(fpath)
+        return self._slots.get(folder, {}).get(fname)
+
+    def _append(self, summary, ctime, mtime) -> int:
+        slot = len(self.entries)
+        self.entries.append(summary)
+        self._ctimes.append(ctime)
+        self._mtimes.append(mtime)
+        self._slots.setdefault(summary.folder, {})[summary.fname] = slot
+        self._count += 1
+        return slot
+
+    # ===== Loading / incremental updates =====
+
+    def load(self, workers: int = LOAD_WORKERS):
+        """Read every folder from disk -> {"files", "seconds", "files_per_sec"}."""
+        t0 = time.perf_counter()
+        self.begin_load()
+        files = 0
+        for batch in self.scan(workers):
+            self.add_loaded(batch)
+            files += len(batch)
+        self.finish_load()
+        return _load_stats(files, time.perf_counter() - t0)
+
+    def scan(self, workers: int = LOAD_WORKERS, chunk_size: int = LOAD_CHUNK, cancel=None):
+        """Yield batches of parsed files (see _load_chunk) in folder/name order as the pool finishes them.
+
+        Only reads; nothing in the index changes. Callers feed the batches to
+        add_loaded() on their own thread, e.g. the UI thread while the pool keeps
+        parsing. `cancel` (a threading.Event) stops the scan early.
+        """
+        cats = list(self.folders)
+        for cat in cats:
+            os.makedirs(self.folder_for(cat), exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # Folders are listed in the pool one after another, each listing queued behind the
+            # previous folder's chunks, so the first rows are ready before the last folder is listed.
+            todo = deque(cats)
+            listing = pool.submit(_json_files, self.folder_for(todo[0])) if todo else None
+            futures = deque()
+            try:
+                while listing is not None or futures:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    if listing is not None and (listing.done() or not futures):
+                        cat = todo.popleft()
+                        fpaths = listing.result()
+                        for i in range(0, len(fpaths), chunk_size):
+                            futures.append(pool.submit(_load_chunk, cat, fpaths[i:i + chunk_size], self.keep_entries))
+                        listing = pool.submit(_json_files, self.folder_for(todo[0])) if todo else None
+                        continue
+                    if listing is not None:
+                        wait((futures[0], listing), return_when=FIRST_COMPLETED)
+                        if not futures[0].done():
+                            continue
+                    yield futures.popleft().result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def begin_load(self):
+        """Empty the index ahead of add_loaded() batches."""
+        self.entries, self.invalid = [], []
+        self._slots, self._count, self._full = {}, 0, {}
+        self._ctimes, self._mtimes = array("d"), array("d")
+        with self._entry_lock:
+            self._entry_cache.clear()
+        self._perms.clear()
+        self._haystacks.clear()
+        self.loaded = False
+        self.version += 1
+
+    def add_loaded(self, batch):
+        """Append one batch from scan() -> (summaries added, [(category, path)] of invalid files)."""
+        added, invalid = [], []
+        for category, fpath, summary, data, ctime, mtime in batch:
+            if summary is None:
+                self.invalid.append((category, fpath))
+                invalid.append((category, fpath))
+            elif self._slot_of(fpath) is None:  # else already add()ed (saved) during the load
+                self._append(summary, ctime, mtime)
+                if data is not None:
+                    self._full[fpath] = data
+                added.append(summary)
+        self._perms.clear()  # rebuilt on the next view(); cheaper than inserting batch by batch
+        self.version += 1
+        return added, invalid
+
+    def finish_load(self):
+        self.loaded = True
+        self.version += 1
+
+    def add(self, fpath: str, category: str):
+        """Read (or re-read) a single JSON file into the index; returns its summary or None."""
+        self.remove(fpath)
+        try:
+            data, summary, st = _load_file(category, fpath)
+        except Exception:
+            self.invalid.append((category, fpath))
+            self.version += 1
+            return None
+
+        slot = self._append(summary, st.st_ctime, st.st_mtime)
+        if self.keep_entries:
+            self._full[fpath] = data
+        for key, perm in self._perms.items():
+            insort(perm, slot, key=lambda i, k=key: self._sort_value(k, i))
+        self.version += 1
+        return summary
+
+    def remove(self, fpath: str):
+        self.invalid = [(c, p) for c, p in self.invalid if p != fpath]
+        with self._entry_lock:
+            self._entry_cache.pop(fpath, None)
+        self._full.pop(fpath, None)
+        slot = self._slot_of(fpath)
+        if slot is None:
+            return
+        for key, perm in self._perms.items():
+            perm.pop(self._find(key, perm, slot))
+        s = self.entries[slot]
+        del self._slots[s.folder][s.fname]
+        self._count -= 1
+        self.entries[slot] = None
+        self._haystacks.pop(slot, None)
+        self.version += 1
+
+    def _find(self, key, perm, slot):
+        # sort values are unique (they end with the path), so a plain bisect finds the slot
+        target = self._sort_value(key, slot)
+        lo, hi = 0, len(perm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._sort_value(key, perm[mid]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # ===== Full entries =====
+
+    def load_entry(self, entry):
+        """Full entry dict for a summary (or path); None if it can no longer be read."""
+        fpath = entry.path if isinstance(entry, EntrySummary) else entry
+        data = self._full.get(fpath)
+        if data is not None:
+            return data
+        with self._entry_lock:
+            data = self._entry_cache.get(fpath)
+            if data is not None:
+                self._entry_cache.move_to_end(fpath)
+                return data
+
+        summary = self.get(fpath)
+        try:
+            data = _read_entry(fpath)
+            if not isinstance(data, dict):
+                raise ValueError("top-level JSON value is not an object")
+        except Exception as e:
+            print(f"[Catalogue] Failed to read '{fpath}': {e}")
+            return None
+        data["full_path"] = fpath
+        if summary is not None:
+            data["category"] = summary.category
+            if summary.also_in:
+                data["also_in"] = list(summary.also_in)
+
+        with self._entry_lock:
+            self._entry_cache[fpath] = data
+            while len(self._entry_cache) > self._entry_cache_size:
+                self._entry_cache.popitem(last=False)
+        return data
+
+    # ===== Sorting =====
+
+    def _sort_value(self, key: str, slot: int):
+        s = self.entries[slot]
+        name = natural_key(s.name)
+        if key == "name":
+            primary = name
+        elif key == "model_type":
+            primary = natural_key(s.model_type)
+        elif key == "source":
+            primary = natural_key(s.source)
+        elif key == "added":
+            primary = self._ctimes[slot]
+        elif key == "modified":
+            primary = self._mtimes[slot]
+        elif key == "tags":
+            primary = s.n_tags
+        elif key == "images":
+            primary = s.n_images
+        else:
+            raise KeyError(f"Unknown sort key: {key}")
+        # name + path as tie-breakers keep the order total and stable
+        return (primary, name, s.folder, s.fname)
+
+    def _perm(self, key: str):
+        """Cached ascending permutation of live slots for a sort key (built once per load).
+
+        Stored as a flat array of slot numbers (4 bytes each); sort values are
+        recomputed for the few slots a binary search touches on add/remove.
+        """
+        perm = self._perms.get(key)
+        if perm is None:
+            live = [slot for slot, s in enumerate(self.entries) if s is not None]
+            perm = array("L", sorted(live, key=lambda i: self._sort_value(key, i)))
+            self._perms[key] = perm
+        return perm
+
+    # ===== Views =====
+
+    def _merged_slots(self):
+        if self._merged_version == self.version:
+            return self._merged
+        # Only copies in *different* category folders are merged: the same file (realpath),
+        # the same JSON name, or the same LoRA file when that file is unique in its category.
+        # Entries of one category are always shown, even when they share a LoRA file.
+        merged = bytearray(len(self.entries))
+        seen_paths = set()
+        real_dirs = {}
+        by_json, by_file = {}, {}
+        for slot, s in enumerate(self.entries):
+            if s is None:
+                continue
+            s.also_in = ()
+            # resolve each folder once (catches symlinked/overlapping category folders)
+            real_dir = real_dirs.get(s.folder)
+            if real_dir is None:
+                real_dir = real_dirs[s.folder] = os.path.realpath(s.folder)
+            real = (real_dir, s.fname)
+            if real in seen_paths:
+                continue
+            seen_paths.add(real)
+            json_key = s.fname.lower()
+            file_key = s.file_name.strip().lower()
+            first = by_json.get(json_key)
+            if first is None and file_key:
+                first = by_file.get(file_key)
+            if (first is not None and first is not _AMBIGUOUS
+                    and first.category != s.category and s.category not in first.also_in):
+                # keep the first copy, but remember the other folders it lives in
+                first.also_in += (s.category,)
+                continue
+            merged[slot] = 1
+            by_json.setdefault(json_key, s)
+            if file_key:
+                other = by_file.get(file_key)
+                if other is None:
+                    by_file[file_key] = s
+                elif other is not _AMBIGUOUS and other.category == s.category:
+                    by_file[file_key] = _AMBIGUOUS
+        self._merged = merged
+        self._merged_version = self.version
+        return merged
+
+    def _view_slots(self, category: str, sort: str, reverse: bool, dedupe: bool = True):
+        perm = self._perm(sort)
+        if reverse:
+            perm = reversed(perm)
+        if category == ALL_CATEGORY:
+            if not dedupe:
+                return list(perm)  # every live entry, copies included
+            merged = self._merged_slots()
+            return [s for s in perm if merged[s]]
+        return [s for s in perm if self.entries[s].category == category]
+
+    def view(self, category: str, sort: str = "name", reverse: bool = False, dedupe: bool = True):
+        """Summaries for one category (or the merged "All" view), sorted; no disk I/O.
+
+        With dedupe=False, "All" lists every entry, including copies kept in several folders.
+        """
+        return [self.entries[s] for s in self._view_slots(category, sort, reverse, dedupe)]
+
+    def groups(self, category: str, group_by: str, sort: str = "name", reverse: bool = False,
+               dedupe: bool = True):
+        """[(group label, summaries)] with groups ordered by `group_by` and entries by `sort`."""
+        if not group_by:
+            return [("", self.view(category, sort, reverse, dedupe))]
+
+        buckets = {}
+        for slot in self._view_slots(category, sort, reverse, dedupe):
+            label, order = self._group_of(group_by, slot)
+            bucket = buckets.get(label)
+            if bucket is None:
+                bucket = buckets[label] = (order, [])
+            bucket[1].append(self.entries[slot])
+        ordered = sorted(buckets.items(), key=lambda kv: kv[1][0])
+        return [(label, items) for label, (_, items) in ordered]
+
+    def _group_of(self, key: str, slot: int):
+        # -> (label, order value)
+        s = self.entries[slot]
+        if key == "category":
+            cats = list(self.folders)
+            return s.category, cats.index(s.category) if s.category in cats else len(cats)
+        if key == "name":
+            first = s.name[:1].upper()
+            label = first if first.isalpha() else "#"
+            return label, (label != "#", label)
+        if key in ("model_type", "source"):
+            value = getattr(s, key).strip()
+            return (value or "(none)"), natural_key(value)
+        if key in ("added", "modified"):
+            ts = self._ctimes[slot] if key == "added" else self._mtimes[slot]
+            label = time.strftime("%Y-%m", time.localtime(ts))
+            return label, label
+        if key == "tags":
+            return f"{s.n_tags} tag{'s' if s.n_tags != 1 else ''}", s.n_tags
+        if key == "images":
+            return f"{s.n_images} image{'s' if s.n_images != 1 else ''}", s.n_images
+        raise KeyError(f"Unknown group key: {key}")
+
+    # ===== Lookup / search =====
+
+    def get(self, fpath: str):
+        slot = self._slot_of(fpath)
+        return None if slot is None else self.entries[slot]
+
+    def find_by_file_name(self, file_name: str):
+        """Summaries whose `file_name` matches (case-insensitive); dict rebuilt once per version."""
+        if self._by_file_name_version != self.version:
+            by_name = {}
+            for s in self.entries:
+                if s is None:
+                    continue
+                key = s.file_name.strip().lower()
+                if key:
+                    by_name.setdefault(key, []).append(s)
+            self._by_file_name = by_name
+            self._by_file_name_version = self.version
+        return list(self._by_file_name.get((file_name or "").strip().lower(), []))
+
+    def _search_fields(self, slot: int, s: EntrySummary, need_full: bool) -> dict:
+        fields = self._haystacks.get(slot)
+        if fields is None:
+            fields = {
+                "name": s.name.lower(),
+                "file_name": s.file_name.lower(),
+                "source": s.source.lower(),
+                "model_type": s.model_type.lower(),
+                "category": s.category.lower(),
+            }
+            self._haystacks[slot] = fields
+        if need_full and "tag" not in fields:
+            # tags/notes aren't in the summary; read the full entry once
+            data = self.load_entry(s) or {}
+            fields["tag"] = "\n".join(_tag_texts(data)).lower()
+            fields["notes"] = _text(data.get("notes")).lower()
+        return fields
+
+    def search(self, query: str, category: str = ALL_CATEGORY, sort: str = "name", reverse: bool = False,
+               dedupe: bool = True):
+        """Summaries matching every term of `query`.
+
+        A bare term matches name, file name, source, model type or tags; `field:value`
+        restricts it to one of SEARCH_FIELDS (e.g. `model_type:sdxl tag:blue`), and
+        `field:=value` requires an exact match (`model_type:=other`).
+        Terms are case-insensitive; quote a term to keep spaces in it.
+        dedupe=False searches every entry of "All", copies included (see view()).
+        """
+        terms = _query_terms(query)
+        return [self.entries[slot] for slot in self._view_slots(category, sort, reverse, dedupe)
+                if self._matches(slot, self.entries[slot], terms)]
+
+    def matching(self, query: str, summaries):
+        """The given summaries (e.g. from entries_in()) that match `query`, in their order; see search()."""
+        terms = _query_terms(query)
+        return [s for s in summaries if self._matches(self._slot_of(s.path), s, terms)]
+
+    def _matches(self, slot: int, s: EntrySummary, terms) -> bool:
+        if not terms:
+            return True
+        fields = self._search_fields(slot, s, any(f in (None, "tag", "notes") for f, _, _ in terms))
+        for field, value, exact in terms:
+            if exact:
+                if value not in fields[field].split("\n"):
+                    return False
+            elif field:
+                if value not in fields[field]:
+                    return False
+            elif not any(value in fields[f] for f in ("name", "file_name", "source", "model_type", "tag")):
+                return False
+        return True
+
+    def entries_in(self, category: str):
+        """Every live entry of `category` ("All": of every folder), in load order; no disk I/O.
+
+        Unlike view(), copies of one entry kept in several folders are all listed, so
+        tools that rewrite or export files reach each copy.
+        """
+        return [s for s in self.entries if s is not None and category in (ALL_CATEGORY, s.category)]
+
+    def invalid_for(self, category: str):
+        if category == ALL_CATEGORY:
+            return [p for _, p in self.invalid]
+        return [p for cat, p in self.invalid if cat == category]
@@ -0,0 +1,327 @@
+# catalogue_server.py
+"""Optional local, read-only HTTP API over the in-memory catalogue.
+
+Start it with `python main.py --serve` (see README). Every response is built
+from the CatalogueIndex loaded at startup, so requests never re-read JSONs.
+
+    GET /api/categories
+    GET /api/entries?category=All&sort=name&desc=0&model_type=SDXL
+    GET /api/search?q=model_type:sdxl%20blue&category=All&sort=name&desc=0
+    GET /api/entry/<id>                 id = "<category>/<json file name>"
+    GET /api/lookup?file_name=example_char.safetensors
+    GET /api/tags?category=All          every tag value with its count
+    GET /api/thumbnail/<id>?image=0&size=256   (image 0 = main, 1.. = additional)
+
+Listing, search and tags cover every entry, including copies of one entry kept
+in several category folders; add `dedupe=1` to get the merged "All" view the
+catalogue window shows instead.
+
+JSON responses carry an ETag and are gzip-encoded when the client accepts it;
+connections are kept alive (HTTP/1.1).
+"""
+import os, json, gzip, hashlib, threading, zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from catalogue_index import CatalogueIndex, ALL_CATEGORY, SORT_KEYS, display_name
+from image_store import resolve as resolve_image_path
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+GZIP_MIN_BYTES = 512
+THUMB_MIN, THUMB_MAX, THUMB_DEFAULT = 32, 1024, 256
+
+
+def entry_id(summary) -> str:
+    return f"{summary.category}/{os.path.basename(summary.path)}"
+
+
+def _public_entry(data: dict) -> dict:
+    # Runtime-only keys stay private; everything from the JSON file is passed through
+    out = {k: v for k, v in data.items() if k not in ("full_path", "also_in")}
+    out["id"] = f"{data['category']}/{os.path.basename(data['full_path'])}"
+    out["display_name"] = display_name(data)
+    return out
+
+
+def _flag(q, name) -> bool:
+    return q.get(name, "0") in ("1", "true", "yes")
+
+
+def _sort_args(q):
+    """-> (sort key, descending?) from ?sort=...&desc=...; display names map to their keys."""
+    return SORT_KEYS.get(q.get("sort", ""), q.get("sort", "name")), _flag(q, "desc")
+
+
+def _summary(s) -> dict:
+    return {
+        "id": entry_id(s),
+        "name": s.name,
+        "file_name": s.file_name,
+        "model_type": s.model_type,
+        "source": s.source,
+        "category": s.category,
+    }
+
+
+class _ResponseCache:
+    """Encoded responses keyed by request; valid for one catalogue version."""
+
+    def __init__(self, max_items: int = 512):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, item):
+        with self._lock:
+            self._items[key] = item
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+class CatalogueAPI:
+    """Request routing + caching, independent of the socket server."""
+
+    def __init__(self, index: CatalogueIndex):
+        self.index = index
+        self.lock = threading.Lock()        # index caches are built lazily; build them one at a time
+        self.json_cache = _ResponseCache()
+        self.thumb_cache = _ResponseCache(max_items=256)
+
+    # ----- JSON endpoints -----
+
+    def _entries(self, q):
+        category = q.get("category", ALL_CATEGORY)
+        sort, desc = _sort_args(q)
+        model_type = q.get("model_type")
+        items = self.index.view(category, sort, desc, dedupe=_flag(q, "dedupe"))
+        if model_type:
+            items = [s for s in items if s.model_type.lower() == model_type.lower()]
+        return {"count": len(items), "entries": [_summary(d) for d in items]}
+
+    def _search(self, q):
+        category = q.get("category", ALL_CATEGORY)
+        sort, desc = _sort_args(q)
+        items = self.index.search(q.get("q", ""), category, sort, desc, dedupe=_flag(q, "dedupe"))
+        return {"count": len(items), "entries": [_summary(d) for d in items]}
+
+    def _lookup(self, q):
+        items = self.index.find_by_file_name(q.get("file_name", ""))
+        entries = [self.index.load_entry(s) for s in items]
+        return {"count": len(items), "entries": [_public_entry(d) for d in entries if d is not None]}
+
+    def _tags(self, q):
+        counts = {}
+        for s in self.index.view(q.get("category", ALL_CATEGORY), dedupe=_flag(q, "dedupe")):
+            data = self.index.load_entry(s) or {}
+            for tag in data.get("tags") or []:
+                value = str((tag.get("value") if isinstance(tag, dict) else tag) or "").strip()
+                if value:
+                    counts[value] = counts.get(value, 0) + 1
+        tags = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0].lower()))
+        return {"count": len(tags), "tags": [{"value": v, "count": n} for v, n in tags]}
+
+    def _entry_by_id(self, eid: str):
+        category, _, fname = eid.partition("/")
+        if category not in self.index.folders:
+            return None
+        fpath = os.path.join(self.index.folder_for(category), fname)
+        return self.index.get(fpath)
+
+    def handle_json(self, path: str, q: dict):
+        """-> (status, payload) for a JSON endpoint, or None if the path isn't one."""
+        if path == "/api/categories":
+            cats = [ALL_CATEGORY] + list(self.index.folders)
+            return 200, {"categories": cats, "sort_keys": list(SORT_KEYS.values())}
+        if path == "/api/entries":
+            return 200, self._entries(q)
+        if path == "/api/search":
+            return 200, self._search(q)
+        if path == "/api/lookup":
+            return 200, self._lookup(q)
+        if path == "/api/tags":
+            return 200, self._tags(q)
+        if path.startswith("/api/entry/"):
+            summary = self._entry_by_id(path[len("/api/entry/"):])
+            data = self.index.load_entry(summary) if summary is not None else None
+            if data is None:
+                return 404, {"error": "entry not found"}
+            return 200, _public_entry(data)
+        return None
+
+    def json_response(self, path: str, query: str):
+        """-> (status, etag, body, gzipped body) served from cache where possible."""
+        key = (self.index.version, path, query)
+        cached = self.json_cache.get(key)
+        if cached is not None:
+            return cached
+
+        q = {k: v[-1] for k, v in parse_qs(query).items()}
+        with self.lock:
+            try:
+                result = self.handle_json(path, q)
+            except KeyError as e:
+                result = 400, {"error": str(e)}
+            except Exception as e:
+                # one malformed JSON must not take the endpoint down with it
+                print(f"[Server] {path} failed: {e!r}")
+                result = 500, {"error": "internal error"}
+        if result is None:
+            result = 404, {"error": "unknown endpoint"}
+        status, payload = result
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        etag = f'"{self.index.version:x}-{zlib.crc32(body):08x}"'
+        gz = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        cached = (status, etag, body, gz)
+        if status == 200:
+            self.json_cache.put(key, cached)
+        return cached
+
+    # ----- Thumbnails -----
+
+    def thumbnail(self, eid: str, q: dict):
+        """-> (status, etag, jpeg bytes or None)."""
+        # Pillow is only needed for thumbnails; the JSON API works without it
+        from image_cache import load_scaled
+
+        with self.lock:
+            summary = self._entry_by_id(eid)
+            data = self.index.load_entry(summary) if summary is not None else None
+        if data is None:
+            return 404, None, None
+        try:
+            which = int(q.get("image", "0"))
+            size = int(q.get("size", THUMB_DEFAULT))
+        except ValueError:
+            return 400, None, None
+        size = max(THUMB_MIN, min(THUMB_MAX, size))
+
+        if which == 0:
+            item = data
+        else:
+            extras = data.get("extra_images") or []
+            item = extras[which - 1] if 0 < which <= len(extras) else None
+        if not isinstance(item, dict):
+            return 404, None, None
+        img_path = str(item.get("image_path") or "")
+        img_path = resolve_image_path(img_path, self.index.base_dir)
+        try:
+            st = os.stat(img_path)
+        except (OSError, ValueError):
+            return 404, None, None
+
+        ident = f"{os.path.abspath(img_path)}|{st.st_mtime_ns}|{st.st_size}|{size}"
+        etag = '"' + hashlib.sha1(ident.encode("utf-8")).hexdigest()[:20] + '"'
+        cached = self.thumb_cache.get(etag)
+        if cached is not None:
+            return 200, etag, cached
+
+        try:
+            img = load_scaled(img_path, short_side=size).convert("RGB")
+        except Exception as e:
+            print(f"[Server] Thumbnail failed '{img_path}': {e}")
+            return 404, None, None
+        buf = BytesIO()
+        img.save(buf, format="JPEG", quality=85)
+        body = buf.getvalue()
+        self.thumb_cache.put(etag, body)
+        return 200, etag, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    server_version = "LoRACatalogue/1.0"
+    api = None  # set by make_server()
+
+    def log_message(self, fmt, *args):
+        if getattr(self.server, "verbose", False):
+            super().log_message(fmt, *args)
+
+    def _etag_matches(self, etag):
+        inm = self.headers.get("If-None-Match", "")
+        return bool(etag) and (inm.strip() == "*" or etag in [t.strip() for t in inm.split(",")])
+
+    def _send(self, status, body, content_type, etag=None, gz=None):
+        if etag and status == 200 and self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        accepts_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        payload = gz if (gz is not None and accepts_gzip) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-cache")  # always revalidate via ETag
+        if gz is not None:
+            self.send_header("Vary", "Accept-Encoding")
+        if payload is gz:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = unquote(parts.path).rstrip("/") or "/"
+
+        if path.startswith("/api/thumbnail/"):
+            q = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            try:
+                status, etag, body = self.api.thumbnail(path[len("/api/thumbnail/"):], q)
+            except Exception as e:
+                print(f"[Server] {path} failed: {e!r}")
+                status, etag, body = 500, None, None
+            if body is None:
+                message = {400: "bad request", 404: "image not found"}.get(status, "internal error")
+                err = json.dumps({"error": message}).encode("utf-8")
+                self._send(status, err, "application/json")
+            else:
+                self._send(status, body, "image/jpeg", etag=etag)
+            return
+
+        status, etag, body, gz = self.api.json_response(path, parts.query)
+        self._send(status, body, "application/json; charset=utf-8", etag=etag, gz=gz)
+
+    do_HEAD = do_GET
+
+
+def make_server(index: CatalogueIndex, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verbose: bool = False):
+    handler = type("CatalogueHandler", (_Handler,), {"api": CatalogueAPI(index)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def run_server(base_dir: str, folders: dict, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verbose: bool = False):
+    # keep full entries in memory so no request ever re-reads a JSON
+    index = CatalogueIndex(base_dir, folders, keep_entries=True)
+    stats = index.load()
+    # Build the common permutation up front so the first requests don't pay for it
+    index.view(ALL_CATEGORY)
+    live = len(index)
+    server = make_server(index, host, port, verbose)
+    print(f"[Server] {live} entries loaded in {stats['seconds']:.2f}s ({stats['files_per_sec']:.0f} files/s); serving http://{host}:{server.server_address[1]}/api/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
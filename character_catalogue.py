@@ -1,9 +1,14 @@
 # character_catalogue.py
 import customtkinter as ctk
-import os, json, re
+import os, re, time, queue, threading
 from PIL import Image
 from tkinter import messagebox
 from PIL import Image, ImageDraw, ImageFont
+import app_settings
+from catalogue_index import CatalogueIndex, ALL_CATEGORY, SORT_KEYS, GROUP_KEYS
+from image_cache import ImageCache
+from image_store import resolve as resolve_image_path
+from thumbnail_grid import ThumbnailGrid
 
 CATEGORY_FOLDERS = {
     "Characters": "Character JSONs",
@@ -17,23 +22,13 @@ COLOUR_MAP = {
     "Misc":       "#113311",
 }
 
-SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_settings.json")
+# Prefetch: how many rows above/below the selection, and how many of each entry's extra images
+PREFETCH_NEIGHBOURS = 1
+PREFETCH_EXTRA_IMAGES = 3
 
-def _load_last_category(default_value: str = "Characters") -> str:
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data.get("last_category", default_value)
-    except Exception:
-        return default_value
-
-def _save_last_category(category: str) -> None:
-    try:
-        data = {"last_category": category}
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"[Settings] Failed to save last_category: {e}")
+# Background loads: how often the UI picks up parsed batches, and how long it may spend per tick
+LOAD_POLL_MS = 30
+LOAD_TICK_BUDGET = 0.05
 
 class CharacterCatalogue(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -43,32 +38,62 @@ class CharacterCatalogue(ctk.CTkFrame):
 
         # --- Data dir (same as AddEditCharacter) ---
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        last_cat = _load_last_category("Characters")
+        last_cat = app_settings.load().get("last_category", "Characters")
         self.category_var = ctk.StringVar(value=last_cat)
 
+        # In-memory copy of every category folder; switching category only filters it
+        self.index = CatalogueIndex(self.base_dir, CATEGORY_FOLDERS)
+        # Decoded preview images + background prefetch of neighbouring/hovered entries
+        self.image_cache = ImageCache(expand=self._prefetch_paths)
+        self._selection_count = 0
+        # Set while a background load is streaming rows in; set() it to abandon that load
+        self._load_cancel = None
+
         # Initialise save_dir immediately so refresh_list() has a folder
+        # ("All" has no folder of its own, so it keeps the default one)
         initial_folder = CATEGORY_FOLDERS.get(last_cat, "Character JSONs")
         self.save_dir = os.path.join(self.base_dir, initial_folder)
         os.makedirs(self.save_dir, exist_ok=True)
 
         def _set_category(cat):
-            folder = CATEGORY_FOLDERS.get(cat, "Character JSONs")
-            self.save_dir = os.path.join(self.base_dir, folder)
-            os.makedirs(self.save_dir, exist_ok=True)
-            _save_last_category(cat)  # persist on change
+            if cat != ALL_CATEGORY:
+                folder = CATEGORY_FOLDERS.get(cat, "Character JSONs")
+                self.save_dir = os.path.join(self.base_dir, folder)
+            app_settings.update(last_category=cat)  # persist on change
             self._apply_category_theme(cat)
-            self.refresh_list()
+            self._populate_list()
 
         cat_bar = ctk.CTkFrame(self)
         cat_bar.grid(row=0, column=0, columnspan=2, sticky="we", padx=10, pady=(8, 0))
         cat_bar.grid_columnconfigure(2, weight=1)
 
         ctk.CTkLabel(cat_bar, text="Category:").grid(row=0, column=0, padx=(0,8))
-        ctk.CTkOptionMenu(cat_bar, values=list(CATEGORY_FOLDERS.keys()),
+        ctk.CTkOptionMenu(cat_bar, values=[ALL_CATEGORY] + list(CATEGORY_FOLDERS.keys()),
                           variable=self.category_var, command=_set_category).grid(row=0, column=1)
 
+        # Sort / group (re-orders the cached permutations; no re-read, no re-sort)
+        self.sort_var = ctk.StringVar(value="Name")
+        self.sort_desc_var = ctk.BooleanVar(value=False)
+        self.group_var = ctk.StringVar(value="None")
+        ctk.CTkLabel(cat_bar, text="Sort:").grid(row=0, column=3, padx=(0, 8))
+        ctk.CTkOptionMenu(cat_bar, values=list(SORT_KEYS.keys()), width=130, variable=self.sort_var,
+                          command=lambda _: self._populate_list()).grid(row=0, column=4)
+        ctk.CTkCheckBox(cat_bar, text="Desc", width=60, variable=self.sort_desc_var,
+                        command=self._populate_list).grid(row=0, column=5, padx=(8, 0))
+        ctk.CTkLabel(cat_bar, text="Group:").grid(row=0, column=6, padx=(8, 8))
+        ctk.CTkOptionMenu(cat_bar, values=list(GROUP_KEYS.keys()), width=130, variable=self.group_var,
+                          command=lambda _: self._populate_list()).grid(row=0, column=7)
+
+        # List of buttons, or a virtualized thumbnail grid for visual browsing
+        self.view_var = ctk.StringVar(value="List")
+        ctk.CTkLabel(cat_bar, text="View:").grid(row=0, column=8, padx=(16, 8))
+        ctk.CTkSegmentedButton(cat_bar, values=["List", "Grid"], variable=self.view_var,
+                               command=self._set_view_mode).grid(row=0, column=9)
+
         self.selected_button = None
-        self.entries = []   # list of (filepath, data)
+        self.selected_button_colour = None  # fg colour to restore on unhighlight
+        self.entries = []   # EntrySummary per row; full entry is loaded on select
+        self.list_buttons = []  # button per self.entries row
 
         # --- Layout: two columns ---
         self.grid_rowconfigure(0, weight=0)  # category bar (fixed)
@@ -86,11 +111,18 @@ class CharacterCatalogue(ctk.CTkFrame):
         header.grid_columnconfigure(0, weight=1)
         ctk.CTkLabel(header, text="Characters", font=("Arial", 16)).grid(row=0, column=0, sticky="w")
         ctk.CTkButton(header, text="Refresh", width=80, command=self.refresh_list).grid(row=0, column=1, sticky="e", padx=(8,0))
+        self.load_status = ctk.CTkLabel(header, text="", font=("Arial", 11))
+        self.load_status.grid(row=1, column=0, columnspan=2, sticky="w")
 
         self.list_scroll = ctk.CTkScrollableFrame(self.list_panel, width=260)
         self.list_scroll.grid(row=1, column=0, sticky="nswe")
         self.list_panel.grid_rowconfigure(1, weight=1)
 
+        # Shown in place of list_scroll in Grid view; only on-screen tiles are drawn
+        self.grid_view = ThumbnailGrid(self.list_panel, self.index, self.base_dir,
+                                       on_select=lambda s, pos: self._select_entry(s, None, pos),
+                                       on_hover=lambda s: self._prefetch_entries([s]))
+
         self.details_container = ctk.CTkFrame(self, fg_color="transparent")  # < transparent
         self.details_container.grid(row=1, column=1, sticky="nsew", padx=(5, 10), pady=10)
         self.details_container.grid_columnconfigure(0, weight=1)
@@ -175,9 +207,8 @@ class CharacterCatalogue(ctk.CTkFrame):
 
         # State for image
         self.preview_image = None
-        # set initial folder + build list
+        # set initial folder + build list (loads every folder once)
         _set_category(self.category_var.get())
-        self.refresh_list()  # now save_dir and list_scroll both exist
 
     def _row(self, parent, label, var, row):
         wrap = ctk.CTkFrame(parent, fg_color="transparent")
@@ -199,65 +230,309 @@ class CharacterCatalogue(ctk.CTkFrame):
         except Exception:
             pass
 
-    def refresh_list(self):
-        # Clear old buttons
+    def refresh_list(self, reload=True):
+        # Re-read every category folder from disk (in the background), then redraw.
+        # reload=False just redraws from memory (the index is kept current by save/delete).
+        if reload or (not self.index.loaded and self._load_cancel is None):
+            self._start_load()
+        else:
+            self._populate_list()
+
+    def _set_view_mode(self, mode):
+        if mode == "Grid":
+            self.list_scroll.grid_remove()
+            self.grid_view.grid(row=1, column=0, sticky="nswe")
+        else:
+            self.grid_view.grid_remove()
+            self.list_scroll.grid(row=1, column=0, sticky="nswe")
+        selected = self.current_file_path
+        self._populate_list()
+        if selected:
+            self._reselect(selected)
+
+    def _grid_mode(self):
+        return self.view_var.get() == "Grid"
+
+    def _start_load(self):
+        # Files are parsed by the index's worker pool on a background thread; the UI
+        # thread picks up finished batches every LOAD_POLL_MS and adds their rows.
+        if self._load_cancel is not None:
+            self._load_cancel.set()
+        cancel = threading.Event()
+        self._load_cancel = cancel
+        batches = queue.Queue()
+
+        def scan():
+            try:
+                for batch in self.index.scan(cancel=cancel):
+                    batches.put(batch)
+            except Exception as e:
+                batches.put(e)
+            batches.put(None)
+
+        self.index.begin_load()
+        self._clear_list()
+        # Images may have been changed outside the app (relocate, bulk edit, archive import)
+        self.grid_view.clear_thumbnails()
+        self._load_started = time.perf_counter()
+        self._load_files = 0
+        self.load_status.configure(text="Loading...")
+        threading.Thread(target=scan, name="catalogue-load", daemon=True).start()
+        self.after(LOAD_POLL_MS, self._drain_load, batches, cancel)
+
+    def _drain_load(self, batches, cancel):
+        if cancel is not self._load_cancel:
+            return  # superseded by a newer refresh
+        cat = self.category_var.get()
+        show_all = cat == ALL_CATEGORY
+        deadline = time.perf_counter() + LOAD_TICK_BUDGET
+        done = False
+        while time.perf_counter() < deadline:
+            try:
+                batch = batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None or isinstance(batch, Exception):
+                if batch is not None:
+                    print(f"[Catalogue] Load failed: {batch}")
+                done = True
+                break
+            added, invalid = self.index.add_loaded(batch)
+            self._load_files += len(batch)
+            for c, fpath in invalid:
+                if show_all or c == cat:
+                    self._add_invalid_button(fpath)
+            self._add_rows([s for s in added if show_all or s.category == cat], show_all)
+
+        if not done:
+            self.load_status.configure(text=f"Loading... {self._load_files} files")
+            self.after(LOAD_POLL_MS, self._drain_load, batches, cancel)
+            return
+
+        self.index.finish_load()
+        self._load_cancel = None
+        elapsed = time.perf_counter() - self._load_started
+        rate = self._load_files / max(elapsed, 1e-9)
+        self.load_status.configure(text=f"{self._load_files} files in {elapsed:.2f}s ({rate:.0f} files/s)")
+        print(f"[Catalogue] Loaded {self._load_files} files in {elapsed:.2f}s ({rate:.0f} files/s)")
+        # Streamed rows arrive in folder order; put them in the chosen sort/group order
+        selected = self.current_file_path
+        self._finish_list()
+        if selected:
+            self._reselect(selected)
+
+    def _reselect(self, fpath):
+        for pos, summary in enumerate(self.entries):
+            if summary.path == fpath:
+                if self._grid_mode():
+                    self.grid_view.select(pos)
+                    self._select_entry(summary, None, pos)
+                else:
+                    self._select_entry(summary, self.list_buttons[pos], pos)
+                return
+
+    def _clear_list(self):
         for w in self.list_scroll.winfo_children():
             w.destroy()
         self.entries.clear()
+        self.list_buttons.clear()
+        self.grid_view.set_items([])
         self.selected_button = None
+        self.selected_button_colour = None
         self.current_file_path = None
         self._clear_details()
 
-        # Load all jsons
-        files = sorted(
-            [f for f in os.listdir(self.save_dir) if f.lower().endswith(".json")],
-            key=str.lower
-        )
-        if not files:
+    def _add_invalid_button(self, fpath):
+        if self._grid_mode():
+            return  # invalid files have no tile; List view shows them
+        # show a disabled button with error note
+        btn = ctk.CTkButton(self.list_scroll, text=f"{os.path.basename(fpath)} (invalid)", state="disabled")
+        btn.pack(fill="x", pady=2, padx=6)
+
+    def _populate_list(self):
+        # Rebuild the buttons from the in-memory index (no disk I/O)
+        if self._load_cancel is not None:
+            # still loading: show what has arrived so far; the rest streams in
+            cat = self.category_var.get()
+            show_all = cat == ALL_CATEGORY
+            self._clear_list()
+            for fpath in self.index.invalid_for(cat):
+                self._add_invalid_button(fpath)
+            self._add_rows([s for s in self.index.entries
+                            if s is not None and (show_all or s.category == cat)], show_all)
+            return
+        if not self.index.loaded:
+            self._start_load()
+            return
+
+        self._clear_list()
+
+        cat = self.category_var.get()
+        show_all = cat == ALL_CATEGORY
+        sort_key = SORT_KEYS.get(self.sort_var.get(), "name")
+        group_key = GROUP_KEYS.get(self.group_var.get())
+        groups = self.index.groups(cat, group_key, sort_key, reverse=self.sort_desc_var.get())
+        invalid = self.index.invalid_for(cat)
+        if self._grid_mode():
+            # group order is kept; the grid has no header rows
+            self._add_rows([s for _, items in groups for s in items], show_all)
+            return
+        if not any(items for _, items in groups) and not invalid:
             ctk.CTkLabel(self.list_scroll, text="(No JSONs found)").pack(pady=10)
             return
 
-        for fname in files:
-            fpath = os.path.join(self.save_dir, fname)
+        for fpath in invalid:
+            self._add_invalid_button(fpath)
+
+        for label, items in groups:
+            if label:
+                ctk.CTkLabel(self.list_scroll, text=f"{label} ({len(items)})",
+                             font=("Arial", 13, "bold")).pack(anchor="w", padx=6, pady=(8, 0))
+            for summary in items:
+                self._add_list_button(summary, show_all)
+
+    def _finish_list(self):
+        # Reorders the streamed buttons instead of re-creating them; only group headers,
+        # invalid-file rows and buttons the merged "All" view dropped are rebuilt
+        if self._grid_mode():
+            self._populate_list()  # the grid only swaps its item list
+            return
+        cat = self.category_var.get()
+        show_all = cat == ALL_CATEGORY
+        sort_key = SORT_KEYS.get(self.sort_var.get(), "name")
+        group_key = GROUP_KEYS.get(self.group_var.get())
+        groups = self.index.groups(cat, group_key, sort_key, reverse=self.sort_desc_var.get())
+        invalid = self.index.invalid_for(cat)
+        ordered = [s for _, items in groups for s in items]
+        streamed = dict(zip(map(id, self.entries), self.list_buttons))
+
+        if self.selected_button is not None:
+            # un-highlight now; the caller reselects, and would otherwise keep the highlight as its colour
             try:
-                with open(fpath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                self.selected_button.configure(fg_color=self.selected_button_colour)
             except Exception:
-                # show a disabled button with error note
-                btn = ctk.CTkButton(self.list_scroll, text=f"{fname} (invalid)", state="disabled")
-                btn.pack(fill="x", pady=2, padx=6)
-                continue
-
-            # attach full path for delete
-            data["full_path"] = fpath
-            self.entries.append((fpath, data))
-
-            btn_text = data.get("name") or os.path.splitext(fname)[0]
-            btn = ctk.CTkButton(self.list_scroll, text=btn_text)
-            btn.configure(command=lambda d=data, b=btn: self._select_entry(d, b))
+                pass
+            self.selected_button = None
+
+        in_order = (not invalid and not any(label for label, _ in groups)
+                    and [id(s) for s in ordered] == list(streamed))
+        if not in_order:
+            reused = {streamed[id(s)] for s in ordered if id(s) in streamed}
+            for w in self.list_scroll.winfo_children():
+                if w in reused:
+                    w.pack_forget()
+                else:
+                    w.destroy()
+        self.entries.clear()
+        self.list_buttons.clear()
+        if not ordered and not invalid:
+            ctk.CTkLabel(self.list_scroll, text="(No JSONs found)").pack(pady=10)
+            return
+
+        if not in_order:
+            for fpath in invalid:
+                self._add_invalid_button(fpath)
+        for label, items in groups:
+            if label and not in_order:
+                ctk.CTkLabel(self.list_scroll, text=f"{label} ({len(items)})",
+                             font=("Arial", 13, "bold")).pack(anchor="w", padx=6, pady=(8, 0))
+            for summary in items:
+                self._add_list_button(summary, show_all, streamed.get(id(summary)), repack=not in_order)
+
+    def _add_rows(self, summaries, show_all):
+        if not self._grid_mode():
+            for summary in summaries:
+                self._add_list_button(summary, show_all)
+            return
+        self.entries.extend(summaries)
+        if not self.grid_view.items:
+            colour_for = (lambda s: COLOUR_MAP.get(s.category)) if show_all else None
+            self.grid_view.set_items(summaries, colour_for)
+        else:
+            self.grid_view.extend(summaries)
+
+    def _add_list_button(self, summary, show_all, btn=None, repack=True):
+        # btn: a button already made for this summary (see _finish_list) to reuse
+        self.entries.append(summary)
+
+        btn_text = summary.name
+        if show_all:
+            # Keep the folder visible in the merged view, plus its category colour
+            cats = (summary.category,) + summary.also_in
+            btn_text = f"{btn_text}  [{', '.join(cats)}]"
+        if btn is None:
+            if show_all:
+                btn = ctk.CTkButton(self.list_scroll, text=btn_text,
+                                    fg_color=COLOUR_MAP.get(summary.category, "#1a1a1a"))
+            else:
+                btn = ctk.CTkButton(self.list_scroll, text=btn_text)
+            btn.bind("<Enter>", lambda e, s=summary: self._prefetch_entries([s]), add="+")
+            repack = True
+        elif btn.cget("text") != btn_text:
+            btn.configure(text=btn_text)  # the merge may have found more folders for it
+        pos = len(self.entries) - 1
+        self.list_buttons.append(btn)
+        if repack:  # a button left in place keeps its position, so its command still fits
+            btn.configure(command=lambda s=summary, b=btn, i=pos: self._select_entry(s, b, i))
             btn.pack(fill="x", pady=2, padx=6)
 
-    def _select_entry(self, data, btn):
+    def _select_entry(self, summary, btn, pos=None):
+        # Only the summary is kept for the list; read the full entry now (LRU-cached)
+        data = self.index.load_entry(summary)
+        if data is None:
+            messagebox.showerror("Error", f"Could not read:\n{summary.path}\n\nTry Refresh.")
+            return
+
         # Remember which file is open (for DELETE)
-        self.current_file_path = data.get("full_path", None)
+        self.current_file_path = summary.path
 
         # Unhighlight previous
         if self.selected_button:
             try:
-                self.selected_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+                self.selected_button.configure(fg_color=self.selected_button_colour)
             except Exception:
                 pass
 
-        # Highlight current
+        # Highlight current (grid tiles highlight themselves)
         self.selected_button = btn
-        try:
-            btn.configure(fg_color="#444444")
-        except Exception:
-            pass
+        if btn is not None:
+            try:
+                self.selected_button_colour = btn.cget("fg_color")
+                btn.configure(fg_color="#444444")
+            except Exception:
+                pass
 
         # Populate details
         self._show_details(data)
 
+        # Warm the cache for the rows around this one (browsing is mostly sequential)
+        if pos is not None:
+            lo = max(0, pos - PREFETCH_NEIGHBOURS)
+            hi = min(len(self.entries), pos + PREFETCH_NEIGHBOURS + 1)
+            around = [self.entries[i] for i in range(lo, hi) if i != pos]
+            self._prefetch_entries(around, replace=True)
+
+        self._selection_count += 1
+        if self._selection_count % 10 == 0:
+            st = self.image_cache.stats()
+            print(f"[Prefetch] hit rate {st['hit_rate']:.0%} ({st['hits']}/{st['hits'] + st['misses']}), "
+                  f"prefetched {st['prefetched']}, used {st['prefetch_hits']}")
+
+    def _prefetch_entries(self, summaries, replace=False):
+        # Only queues the summaries; entry reads and image stats happen on the prefetch thread
+        self.image_cache.prefetch(summaries, replace=replace)
+
+    def _prefetch_paths(self, summary):
+        # Runs on the prefetch thread. Loading the entry also warms the index's entry cache for the next click
+        data = self.index.load_entry(summary)
+        if data is None:
+            return []
+        paths = [resolve_image_path((data.get("image_path") or "").strip(), self.base_dir)]
+        for item in (data.get("extra_images") or [])[:PREFETCH_EXTRA_IMAGES]:
+            if isinstance(item, dict):
+                paths.append(resolve_image_path((item.get("image_path") or "").strip(), self.base_dir))
+        return paths
+
     def _clear_details(self):
         self.name_var.set("")
         self.file_var.set("")
@@ -295,7 +570,7 @@ class CharacterCatalogue(ctk.CTkFrame):
         self.notes_box.insert("1.0", data.get("notes", ""))
         self.notes_box.configure(state="disabled")
 
-        img_path = data.get("image_path") or ""
+        img_path = resolve_image_path(data.get("image_path") or "", self.base_dir)
         self._set_preview(img_path if os.path.exists(img_path) else None)
 
         self._render_tags(data.get("tags", []))
@@ -310,12 +585,9 @@ class CharacterCatalogue(ctk.CTkFrame):
             self.image_label.image = self.preview_image  # keep strong ref
             return
         try:
-            img = Image.open(image_path).convert("RGBA")
-            ow, oh = img.size
-            # shortest side -> 300
-            scale = 300 / min(ow, oh)
-            nw, nh = max(1, int(ow * scale)), max(1, int(oh * scale))
-            img = img.resize((nw, nh), Image.LANCZOS)
+            # shortest side -> 300 (cached, possibly already prefetched)
+            img = self.image_cache.get(image_path)
+            nw, nh = img.size
 
             self.preview_image = ctk.CTkImage(light_image=img, dark_image=img, size=(nw, nh))
             self.image_label.configure(image=self.preview_image, text="")
@@ -393,8 +665,10 @@ class CharacterCatalogue(ctk.CTkFrame):
             return
 
         try:
-            if os.path.exists(self.current_file_path):
-                os.remove(self.current_file_path)
+            deleted_path = self.current_file_path
+            if os.path.exists(deleted_path):
+                os.remove(deleted_path)
+            self.index.remove(deleted_path)
             # Clear UI + state
             self.current_file_path = None
             self._clear_details()
@@ -405,8 +679,8 @@ class CharacterCatalogue(ctk.CTkFrame):
                 except Exception:
                     pass
                 self.selected_button = None
-            # Rebuild the list
-            self.refresh_list()
+            # Rebuild the list (from memory; the index already dropped the entry)
+            self._populate_list()
             messagebox.showinfo("Deleted", f"Deleted:\n{fname}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete file:\n{e}")
@@ -426,7 +700,7 @@ class CharacterCatalogue(ctk.CTkFrame):
         row = 0
         for item in items:
             title = (item.get("title") or "").strip()
-            path = (item.get("image_path") or "").strip()
+            path = resolve_image_path((item.get("image_path") or "").strip(), self.base_dir)
 
             if title:
                 ctk.CTkLabel(self.extra_images_container, text=title).grid(row=row, column=0, sticky="w", pady=(4, 2))
@@ -436,12 +710,8 @@ class CharacterCatalogue(ctk.CTkFrame):
             img_to_use = None
             if path and os.path.exists(path):
                 try:
-                    from PIL import Image
-                    img = Image.open(path).convert("RGBA")
-                    ow, oh = img.size
-                    scale = 300 / min(ow, oh)
-                    nw, nh = max(1, int(ow * scale)), max(1, int(oh * scale))
-                    img = img.resize((nw, nh), Image.LANCZOS)
+                    img = self.image_cache.get(path)
+                    nw, nh = img.size
                     cimg = ctk.CTkImage(light_image=img, dark_image=img, size=(nw, nh))
                     img_to_use = cimg
                 except Exception as e:
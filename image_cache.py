@@ -0,0 +1,158 @@
+# image_cache.py
+import os, threading
+from collections import OrderedDict
+from PIL import Image
+
+PREVIEW_SHORT_SIDE = 300
+
+
+def load_scaled(path: str, short_side: int = PREVIEW_SHORT_SIDE) -> Image.Image:
+    """Open image at path and scale the shortest side to `short_side`, keeping aspect."""
+    img = Image.open(path).convert("RGBA")
+    ow, oh = img.size
+    scale = short_side / min(ow, oh)
+    nw, nh = max(1, int(ow * scale)), max(1, int(oh * scale))
+    return img.resize((nw, nh), Image.LANCZOS)
+
+
+def load_thumbnail(path: str, size: int) -> Image.Image:
+    """Image at path fitted inside size x size (RGB). JPEGs are decoded at reduced scale."""
+    img = Image.open(path)
+    img.draft("RGB", (size, size))  # no-op for non-JPEG
+    img = img.convert("RGB")
+    img.thumbnail((size, size), Image.LANCZOS)
+    return img
+
+
+class ImageCache:
+    """LRU of decoded, already-scaled PIL images plus a low-priority prefetcher.
+
+    `get()` is the foreground path (called on the UI thread for the current
+    selection). `prefetch()` only queues items for a single background thread,
+    which only works while no foreground load is running and keeps a bounded
+    queue, so it never competes with what the user is actually looking at.
+    Items are image paths, or anything `expand(item)` turns into a list of paths
+    (e.g. a catalogue entry); expanding and stat-ing happen on that thread too.
+    Only PIL images are cached; CTkImage/PhotoImage must still be built on the UI thread.
+    """
+
+    def __init__(self, max_items: int = 64, max_pending: int = 24, expand=None):
+        self.max_items = max_items
+        self.max_pending = max_pending
+        self._expand = expand or (lambda path: [path])
+        self._items = OrderedDict()      # key -> PIL image
+        self._pending = OrderedDict()    # item -> None, waiting for the prefetcher
+        self._prefetched = set()         # keys warmed by the prefetcher, not yet used
+        self._busy = 0                   # foreground loads in progress
+        self._cond = threading.Condition()
+
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.prefetch_hits = 0
+
+        self._worker = threading.Thread(target=self._prefetch_loop, name="image-prefetch", daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def _key(path: str):
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def _store(self, key, img):
+        # caller holds the lock
+        self._items[key] = img
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            old, _ = self._items.popitem(last=False)
+            self._prefetched.discard(old)
+
+    def get(self, path: str) -> Image.Image:
+        """Scaled image for path; raises like Image.open if it can't be read."""
+        key = self._key(path)
+        with self._cond:
+            img = self._items.get(key)
+            if img is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                if key in self._prefetched:
+                    self._prefetched.discard(key)
+                    self.prefetch_hits += 1
+                return img
+            self.misses += 1
+            self._pending.pop(key, None)
+            self._busy += 1
+
+        img = None
+        try:
+            img = load_scaled(path)
+            return img
+        finally:
+            with self._cond:
+                self._busy -= 1
+                if img is not None:
+                    self._store(key, img)
+                self._cond.notify_all()
+
+    def prefetch(self, items, replace: bool = False):
+        """Queue items for background decoding; no I/O here. `replace` drops whatever was queued before."""
+        with self._cond:
+            if replace:
+                self._pending.clear()
+            for item in items:
+                if item:
+                    self._pending[item] = None
+                    self._pending.move_to_end(item)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+            self._cond.notify_all()
+
+    def _wait_idle(self):
+        # caller holds the lock; foreground loads go first
+        while self._busy:
+            self._cond.wait()
+
+    def _prefetch_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending or self._busy:
+                    self._cond.wait()
+                item, _ = self._pending.popitem(last=False)
+            try:
+                paths = self._expand(item)
+            except Exception:
+                continue
+            for path in paths:
+                if not path:
+                    continue
+                with self._cond:
+                    self._wait_idle()
+                try:
+                    key = self._key(path)
+                except OSError:
+                    continue  # missing file; the viewer will show the placeholder anyway
+                with self._cond:
+                    if key in self._items:
+                        continue
+                try:
+                    img = load_scaled(path)
+                except Exception:
+                    continue
+                with self._cond:
+                    if key not in self._items:
+                        self._store(key, img)
+                        self._prefetched.add(key)
+                        self.prefetched += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "prefetched": self.prefetched,
+                "prefetch_hits": self.prefetch_hits,
+                "cached": len(self._items),
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,253 @@
+# image_relocate.py
+"""Relink entries whose images were moved to another folder or drive.
+
+    python image_relocate.py E:/Images --dry-run
+    python image_relocate.py E:/Images F:/Archive/Pictures --category Styles
+
+Every `image_path` / `extra_images[].image_path` that no longer exists is looked
+up in an index of the candidate roots, built once: file name -> [(path, size)].
+A name found once is relinked directly. When a name exists several times, the
+copies are grouped by size + a partial content hash (first and last 64 KB); if
+they are all the same file any copy will do, otherwise the copy whose parent
+folders best match the old path wins, and ties are reported as ambiguous.
+
+Changed entries are written in one batch through the bulk-edit journal, so a
+run can be undone with `python bulk_edit.py --rollback <run id>`.
+"""
+import os, sys, time, hashlib, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from catalogue_index import CatalogueIndex, ALL_CATEGORY, entry_text, display_name, read_text
+from bulk_edit import confirm_and_apply, list_journals, STATE_APPLYING
+from image_store import is_store_ref
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp")
+PARTIAL_HASH_BYTES = 64 * 1024
+
+
+def _split(path: str):
+    # Entries may hold Windows paths with either separator; compare case-insensitively
+    return [p for p in path.replace("\\", "/").lower().split("/") if p]
+
+
+def partial_hash(path: str, size: int) -> str:
+    """Hash of the size plus the first and last PARTIAL_HASH_BYTES: cheap, and enough to tell copies apart."""
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+            h.update(f.read(PARTIAL_HASH_BYTES))
+    return h.hexdigest()
+
+
+def _walk(root: str):
+    """-> [(path, size)] for every image under root (scandir: no extra stat per file on Windows)."""
+    found, stack = [], [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                        elif e.name.lower().endswith(IMAGE_EXTS):
+                            found.append((e.path, e.stat().st_size))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"[Relocate] Skipping '{folder}': {e}")
+    return found
+
+
+class ImageFileIndex:
+    """File name -> [(path, size)] over the candidate roots, with partial hashes on demand."""
+
+    def __init__(self, roots, workers: int = 8):
+        self.by_name = {}
+        self.files = 0
+        self._hashes = {}
+        self.workers = workers
+        # one walker per root keeps several drives busy at once
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(roots)))) as pool:
+            for found in pool.map(_walk, roots):
+                for path, size in found:
+                    self.by_name.setdefault(os.path.basename(path).lower(), []).append((path, size))
+                self.files += len(found)
+
+    def hash_names(self, names):
+        """Partial-hash every copy of the given (duplicated) names, in parallel."""
+        todo = [c for n in names for c in self.by_name.get(n, ()) if c[0] not in self._hashes]
+
+        def one(candidate):
+            try:
+                return partial_hash(*candidate)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for (path, _), digest in zip(todo, pool.map(one, todo, chunksize=32)):
+                self._hashes[path] = digest
+
+    def match(self, old_path: str):
+        """-> (new path or None, reason) where reason is "found", "missing" or "ambiguous"."""
+        old_parts = _split(old_path)
+        if not old_parts:
+            return None, "missing"
+        candidates = self.by_name.get(old_parts[-1])
+        if not candidates:
+            return None, "missing"
+        if len(candidates) == 1:
+            return candidates[0][0], "found"
+
+        def suffix_score(path):
+            # how many parent folders (from the file upwards) agree with the old path
+            n = 0
+            for a, b in zip(reversed(old_parts[:-1]), reversed(_split(path)[:-1])):
+                if a != b:
+                    break
+                n += 1
+            return n
+
+        ranked = sorted(candidates, key=lambda c: suffix_score(c[0]), reverse=True)
+        contents = {(size, self._hashes.get(path)) for path, size in candidates}
+        if len(contents) == 1 and None not in next(iter(contents)):
+            return ranked[0][0], "found"  # identical copies: take the best-placed one
+        if suffix_score(ranked[0][0]) > suffix_score(ranked[1][0]):
+            return ranked[0][0], "found"
+        return None, "ambiguous"
+
+
+def _image_refs(data: dict):
+    """-> [(setter, path)] for the main image and each extra image (local store copies never move)."""
+    refs = []
+    if str(data.get("image_path") or "").strip():
+        refs.append((("image_path",), data["image_path"].strip()))
+    for i, item in enumerate(data.get("extra_images") or []):
+        if isinstance(item, dict) and str(item.get("image_path") or "").strip():
+            refs.append((("extra_images", i), item["image_path"].strip()))
+    return [(setter, path) for setter, path in refs if not is_store_ref(path)]
+
+
+def _missing_paths(paths, workers: int = 8):
+    """Subset of `paths` that don't exist; each parent folder is listed once instead of a stat per file."""
+    by_dir = {}
+    for p in paths:
+        by_dir.setdefault(os.path.dirname(p), set()).add(p)
+
+    def listing(folder):
+        try:
+            return {os.path.normcase(n) for n in os.listdir(folder or ".")}
+        except OSError:
+            return set()
+
+    missing = set()
+    folders = list(by_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for folder, names in zip(folders, pool.map(listing, folders)):
+            for p in by_dir[folder]:
+                if os.path.normcase(os.path.basename(p)) not in names:
+                    missing.add(p)
+    return missing
+
+
+def plan(index: CatalogueIndex, files: ImageFileIndex, category: str = ALL_CATEGORY, workers: int = 8):
+    """-> (changes, stats); changes are (path, before text, after text, edited entry) for bulk_edit.apply."""
+    entries = [index.load_entry(s) for s in index.entries_in(category)]
+    entries = [d for d in entries if d is not None]
+    refs = [(data, setter, path) for data in entries for setter, path in _image_refs(data)]
+    missing = _missing_paths({path for _, _, path in refs}, workers)
+
+    names = {os.path.basename(p.replace("\\", "/")).lower() for p in missing}
+    files.hash_names(n for n in names if len(files.by_name.get(n, ())) > 1)
+
+    stats = {"references": len(refs), "broken": 0, "relinked": 0, "ambiguous": [], "not_found": []}
+    new_paths = {}
+    for p in missing:
+        new_paths[p] = files.match(p)
+
+    edited_by_path = {}
+    for data, setter, path in refs:
+        if path not in missing:
+            continue
+        stats["broken"] += 1
+        new, reason = new_paths[path]
+        if new is None:
+            stats["not_found" if reason == "missing" else "ambiguous"].append((data, path))
+            continue
+        edited = edited_by_path.get(data["full_path"])
+        if edited is None:
+            edited = dict(data)
+            if "extra_images" in data:
+                edited["extra_images"] = [dict(i) if isinstance(i, dict) else i for i in data["extra_images"]]
+            edited_by_path[data["full_path"]] = edited
+        if setter[0] == "image_path":
+            edited["image_path"] = new
+        else:
+            edited["extra_images"][setter[1]]["image_path"] = new
+        stats["relinked"] += 1
+
+    fpaths = list(edited_by_path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        befores = list(pool.map(read_text, fpaths, chunksize=64))
+    changes = [(p, before, entry_text(edited_by_path[p]), edited_by_path[p])
+               for p, before in zip(fpaths, befores) if before is not None]
+    return changes, stats
+
+
+def main(argv=None):
+    from character_catalogue import CATEGORY_FOLDERS
+
+    parser = argparse.ArgumentParser(description="Relink catalogue images that were moved")
+    parser.add_argument("roots", nargs="+", help="folders to look for the moved images in")
+    parser.add_argument("--category", default=ALL_CATEGORY, choices=[ALL_CATEGORY] + list(CATEGORY_FOLDERS))
+    parser.add_argument("--dry-run", action="store_true", help="report what would be relinked; write nothing")
+    parser.add_argument("--yes", "-y", action="store_true", help="don't ask for confirmation")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    roots = [r for r in args.roots if os.path.isdir(r)]
+    for r in set(args.roots) - set(roots):
+        print(f"[Relocate] Not a folder, ignored: {r}")
+    if not roots:
+        return 2
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    workers = max(1, args.workers)
+    for txid, state, _ in list_journals(base_dir):
+        if state == STATE_APPLYING:
+            print(f"[Relocate] Warning: bulk edit run {txid} was interrupted; see bulk_edit.py --resume/--rollback")
+
+    t0 = time.perf_counter()
+    index = CatalogueIndex(base_dir, CATEGORY_FOLDERS, keep_entries=True)
+    index.load()
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    files = ImageFileIndex(roots, workers)
+    t_scan = time.perf_counter() - t0
+    print(f"[Relocate] {len(index)} entries loaded in {t_load:.2f}s; "
+          f"{files.files} images indexed under {len(roots)} root(s) in {t_scan:.2f}s")
+
+    t0 = time.perf_counter()
+    changes, stats = plan(index, files, args.category, workers)
+    t_match = time.perf_counter() - t0
+    print(f"[Relocate] {stats['references']} image references, {stats['broken']} broken: "
+          f"{stats['relinked']} relinked, {len(stats['ambiguous'])} ambiguous, "
+          f"{len(stats['not_found'])} not found ({t_match:.2f}s)")
+    for label, items in (("Ambiguous", stats["ambiguous"]), ("Not found", stats["not_found"])):
+        for data, path in items[:10]:
+            print(f"    {label}: {path}  ({display_name(data)})")
+        if len(items) > 10:
+            print(f"    ... and {len(items) - 10} more")
+    if not changes or args.dry_run:
+        return 0
+
+    ops = [("relocate_images",) + tuple(roots)]
+    return confirm_and_apply(base_dir, changes, "image relocation", ops, f"Rewrite {len(changes)} entries?",
+                             "[Relocate]", args.yes, workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
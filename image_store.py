@@ -0,0 +1,239 @@
+# image_store.py
+"""Content-addressed local copies of catalogue images.
+
+Images live next to the category folders as `Image Store/<2 hex>/<sha256>.<ext>`
+and entries reference them by that relative path, so previews never touch the
+USB drive / NAS the image originally came from. Identical files are stored
+once (the name is the SHA256 of the source bytes). With a max side set, larger
+images are re-encoded (WEBP) so the stored copy is already close to display size.
+
+    python image_store.py migrate --dry-run
+    python image_store.py migrate --max-side 1536 --workers 8
+
+`migrate` copies every external image of the catalogue into the store in
+parallel and rewrites the entries through the bulk-edit journal, so it can be
+undone with `python bulk_edit.py --rollback <run id>`.
+"""
+import os, sys, time, hashlib, threading, argparse
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+import app_settings
+from catalogue_index import CatalogueIndex, entry_text, image_paths, read_text, write_bytes_atomic
+from bulk_edit import confirm_and_apply
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR_NAME = "Image Store"
+REENCODE_QUALITY = 90
+
+
+def is_store_ref(path) -> bool:
+    return str(path or "").replace("\\", "/").startswith(STORE_DIR_NAME + "/")
+
+
+def resolve(path, base_dir: str = APP_DIR) -> str:
+    """Filesystem path for an entry's image_path (store refs are relative to the app folder)."""
+    path = str(path or "")
+    if is_store_ref(path):
+        return os.path.join(base_dir, *path.replace("\\", "/").split("/"))
+    return path
+
+
+def load_settings() -> dict:
+    """-> {"enabled": bool, "max_side": int} from app_settings.json (off by default)."""
+    data = app_settings.load().get("image_store")
+    data = data if isinstance(data, dict) else {}
+    return {"enabled": bool(data.get("enabled", False)), "max_side": int(data.get("max_side", 0) or 0)}
+
+
+def save_enabled(enabled: bool) -> None:
+    store = app_settings.load().get("image_store")
+    store = dict(store) if isinstance(store, dict) else {}
+    store["enabled"] = bool(enabled)
+    app_settings.update(image_store=store)
+
+
+def _reencode(data: bytes, max_side: int):
+    """-> (bytes, ext) scaled so the longest side is max_side, or None if it's already small enough."""
+    from PIL import Image
+
+    img = Image.open(BytesIO(data))
+    if max(img.size) <= max_side:
+        return None
+    img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = BytesIO()
+    img.save(buf, format="WEBP", quality=REENCODE_QUALITY, method=4)
+    return buf.getvalue(), ".webp"
+
+
+class ImageStore:
+    def __init__(self, base_dir: str = APP_DIR, max_side: int = 0):
+        self.base_dir = base_dir
+        self.max_side = max_side
+        self.root = os.path.join(base_dir, STORE_DIR_NAME)
+        self._lock = threading.Lock()
+        self._writing = {}  # digest -> Event, so parallel ingests of identical files store it once
+
+    def find(self, digest: str):
+        """Store ref for a content hash, or None if it isn't stored yet."""
+        shard = os.path.join(self.root, digest[:2])
+        try:
+            names = os.listdir(shard)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            if name.startswith(digest + "."):
+                return f"{STORE_DIR_NAME}/{digest[:2]}/{name}"
+        return None
+
+    def ingest(self, src: str):
+        """Copy an image into the store -> (ref, added). Already-stored refs and duplicates are returned as-is."""
+        if is_store_ref(src):
+            return src, False
+        with open(src, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            writing = self._writing.get(digest)
+            if writing is None:
+                self._writing[digest] = threading.Event()
+        if writing is not None:
+            writing.wait()
+            ref = self.find(digest)
+            if ref is not None:
+                return ref, False
+            return self.ingest(src)  # the other copy failed; try again with this one
+        try:
+            return self._write(src, data, digest)
+        finally:
+            with self._lock:
+                self._writing.pop(digest).set()
+
+    def _write(self, src: str, data: bytes, digest: str):
+        ref = self.find(digest)
+        if ref is not None:
+            return ref, False
+
+        ext = os.path.splitext(src)[1].lower() or ".png"
+        if self.max_side:
+            smaller = _reencode(data, self.max_side)
+            if smaller is not None:
+                data, ext = smaller
+        ref = f"{STORE_DIR_NAME}/{digest[:2]}/{digest}{ext}"
+        dst = resolve(ref, self.base_dir)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        write_bytes_atomic(dst, data)
+        return ref, True
+
+    def try_ingest(self, src: str) -> str:
+        """ingest() for the editor: falls back to the original path if the copy fails."""
+        if not src:
+            return src
+        try:
+            return self.ingest(src)[0]
+        except Exception as e:
+            print(f"[Image Store] Could not store '{src}': {e}")
+            return src
+
+
+# ===== Migration =====
+
+def _with_refs(data: dict, refs: dict) -> dict:
+    edited = dict(data)
+    path = str(data.get("image_path") or "").strip()
+    if path in refs:
+        edited["image_path"] = refs[path]
+    if "extra_images" in data:
+        extras = []
+        for item in data["extra_images"]:
+            if isinstance(item, dict) and str(item.get("image_path") or "").strip() in refs:
+                item = dict(item, image_path=refs[item["image_path"].strip()])
+            extras.append(item)
+        edited["extra_images"] = extras
+    return edited
+
+
+def migrate(index, store: ImageStore, workers: int = 8, dry_run: bool = False):
+    """Ingest every external image in parallel -> (changes for bulk_edit.apply, stats)."""
+    entries = [index.load_entry(s) for s in index.entries if s is not None]
+    entries = [d for d in entries if d is not None]
+    external = sorted({p for d in entries for p in image_paths(d) if not is_store_ref(p)})
+    stats = {"entries": len(entries), "images": len(external), "added": 0, "deduped": 0,
+             "missing": [], "bytes_in": 0, "bytes_out": 0}
+    if dry_run:
+        stats["missing"] = [p for p in external if not os.path.isfile(p)]
+        return [], stats
+
+    def one(path):
+        try:
+            ref, added = store.ingest(path)
+            return ref, added, os.path.getsize(path), (os.path.getsize(resolve(ref, store.base_dir)) if added else 0)
+        except OSError:
+            return None, False, 0, 0
+        except Exception as e:
+            print(f"[Image Store] Could not store '{path}': {e}")
+            return None, False, 0, 0
+
+    refs = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, (ref, added, n_in, n_out) in zip(external, pool.map(one, external)):
+            if ref is None:
+                stats["missing"].append(path)
+                continue
+            refs[path] = ref
+            stats["added" if added else "deduped"] += 1
+            stats["bytes_in"] += n_in
+            stats["bytes_out"] += n_out
+
+    changed = [d for d in entries if any(p in refs for p in image_paths(d))]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        befores = list(pool.map(read_text, [d["full_path"] for d in changed], chunksize=64))
+    changes = []
+    for data, before in zip(changed, befores):
+        if before is not None:
+            edited = _with_refs(data, refs)
+            changes.append((data["full_path"], before, entry_text(edited), edited))
+    return changes, stats
+
+
+def main(argv=None):
+    from character_catalogue import CATEGORY_FOLDERS
+
+    parser = argparse.ArgumentParser(description="Local content-addressed image store")
+    parser.add_argument("command", choices=("migrate",))
+    parser.add_argument("--max-side", type=int, default=None,
+                        help="re-encode images larger than this (longest side, px); default from app_settings.json")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be copied")
+    parser.add_argument("--yes", "-y", action="store_true", help="don't ask for confirmation")
+    args = parser.parse_args(argv)
+
+    max_side = load_settings()["max_side"] if args.max_side is None else max(0, args.max_side)
+    store = ImageStore(APP_DIR, max_side)
+    index = CatalogueIndex(APP_DIR, CATEGORY_FOLDERS, keep_entries=True)
+    index.load()
+
+    t0 = time.perf_counter()
+    changes, stats = migrate(index, store, max(1, args.workers), args.dry_run)
+    elapsed = time.perf_counter() - t0
+    if args.dry_run:
+        print(f"[Image Store] {stats['images']} external images in {stats['entries']} entries would be copied "
+              f"({len(stats['missing'])} missing)")
+        return 0
+
+    mb = lambda b: b / (1024 * 1024)
+    print(f"[Image Store] {stats['images']} images in {elapsed:.2f}s: {stats['added']} stored, "
+          f"{stats['deduped']} already present, {len(stats['missing'])} unreadable; "
+          f"{mb(stats['bytes_in']):.1f} MB read, {mb(stats['bytes_out']):.1f} MB written")
+    for p in stats["missing"][:10]:
+        print(f"    Unreadable: {p}")
+    if not changes:
+        return 0
+    return confirm_and_apply(APP_DIR, changes, "image store migration", [("image_store", max_side)],
+                             f"Point {len(changes)} entries at the store?", "[Image Store]", args.yes,
+                             max(1, args.workers), "Cancelled; copied files stay in the store.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
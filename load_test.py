@@ -0,0 +1,118 @@
+# load_test.py
+"""Concurrent load test for the local catalogue API (`python main.py --serve`).
+
+    python load_test.py --clients 16 --requests 2000
+    python load_test.py --path "/api/search?q=sdxl" --path /api/tags --etag
+
+Each client keeps one HTTP/1.1 connection open and cycles through the given
+paths. With --etag, clients send If-None-Match after the first response, which
+measures the 304 path instead of full bodies.
+"""
+import argparse, http.client, json, threading, time
+from urllib.parse import quote
+
+DEFAULT_PATHS = ["/api/categories", "/api/entries?category=All", "/api/tags", "/api/search?q=a"]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+def _discover_paths(host, port):
+    # Add a few per-entry lookups so the mix isn't only list endpoints
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        conn.request("GET", "/api/entries?category=All")
+        payload = json.loads(conn.getresponse().read() or b"{}")
+    finally:
+        conn.close()
+    paths = []
+    for item in payload.get("entries", [])[:20]:
+        paths.append("/api/entry/" + quote(item["id"]))
+        if item.get("file_name"):
+            paths.append("/api/lookup?file_name=" + quote(item["file_name"]))
+    return paths
+
+
+def _client(host, port, paths, n_requests, use_etag, gzip, latencies, counters, lock, offset):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    local_lat, local_bytes, local_err, local_304 = [], 0, 0, 0
+    for i in range(n_requests):
+        path = paths[(i + offset) % len(paths)]
+        headers = {}
+        if gzip:
+            headers["Accept-Encoding"] = "gzip"
+        if use_etag and path in etags:
+            headers["If-None-Match"] = etags[path]
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            local_err += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        local_lat.append(time.perf_counter() - t0)
+        local_bytes += len(body)
+        if resp.status == 304:
+            local_304 += 1
+        elif resp.status != 200:
+            local_err += 1
+        if resp.getheader("ETag"):
+            etags[path] = resp.getheader("ETag")
+    conn.close()
+    with lock:
+        latencies.extend(local_lat)
+        counters["bytes"] += local_bytes
+        counters["errors"] += local_err
+        counters["not_modified"] += local_304
+
+
+def run(host, port, clients, total_requests, paths, use_etag, gzip):
+    per_client = max(1, total_requests // clients)
+    latencies, lock = [], threading.Lock()
+    counters = {"bytes": 0, "errors": 0, "not_modified": 0}
+    threads = [
+        threading.Thread(target=_client, args=(host, port, paths, per_client, use_etag, gzip,
+                                               latencies, counters, lock, i))
+        for i in range(clients)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat = sorted(latencies)
+    ms = lambda v: f"{v * 1000:.2f} ms"
+    print(f"clients={clients} requests={len(lat)} errors={counters['errors']} "
+          f"304s={counters['not_modified']} time={elapsed:.2f}s")
+    print(f"throughput: {len(lat) / elapsed:.0f} req/s, {counters['bytes'] / elapsed / 1e6:.2f} MB/s")
+    print(f"latency: p50 {ms(_percentile(lat, 50))}  p95 {ms(_percentile(lat, 95))}  "
+          f"p99 {ms(_percentile(lat, 99))}  max {ms(lat[-1] if lat else 0)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests across all clients")
+    parser.add_argument("--path", action="append", help="endpoint to hit (repeatable); default is a mixed set")
+    parser.add_argument("--etag", action="store_true", help="revalidate with If-None-Match")
+    parser.add_argument("--no-gzip", action="store_true", help="don't send Accept-Encoding: gzip")
+    args = parser.parse_args(argv)
+
+    paths = args.path or (DEFAULT_PATHS + _discover_paths(args.host, args.port))
+    run(args.host, args.port, max(1, args.clients), args.requests, paths, args.etag, not args.no_gzip)
+
+
+if __name__ == "__main__":
+    main()
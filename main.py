@@ -1,9 +1,11 @@
 # main.py
 import customtkinter as ctk
 import sys
+import os
+import argparse
 
 from main_menu import MainMenu
-from character_catalogue import CharacterCatalogue
+from character_catalogue import CharacterCatalogue, CATEGORY_FOLDERS
 from add_edit_character import AddEditCharacter
 
 class App(ctk.CTk):
@@ -35,10 +37,26 @@ class App(ctk.CTk):
 
         # Auto-refresh catalogue on entry
         if frame_name == "CharacterCatalogue" and hasattr(frame, "refresh_list"):
-            # If the dropdown handler sets theme/dir, you can also reapply it here if needed
-            frame.refresh_list()
+            # Redraw from the in-memory index (kept current by save/delete); "Refresh" re-reads disk
+            frame.refresh_list(reload=False)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stable Diffusion LoRA Organizer")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the local read-only HTTP API instead of the GUI")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port for --serve (default: 8765)")
+    parser.add_argument("--verbose", action="store_true", help="log every request in --serve mode")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.serve:
+        from catalogue_server import run_server
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        run_server(base_dir, CATEGORY_FOLDERS, host=args.host, port=args.port, verbose=args.verbose)
+        sys.exit(0)
+
     ctk.set_appearance_mode("Dark")  # or "Light"
     ctk.set_default_color_theme("blue")
     app = App()
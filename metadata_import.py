@@ -0,0 +1,443 @@
+# metadata_import.py
+"""Stream large offline metadata dumps into the catalogue.
+
+    python metadata_import.py dump.jsonl models.json.gz --dry-run
+    python metadata_import.py dump.jsonl --lora-dir D:/LoRAs --overwrite
+
+Dumps are read record by record (JSONL line by line, JSON arrays element by
+element), so memory stays flat however large the file is. Records are matched
+to catalogue entries by `file_name`, or by model hash (SHA256 / AutoV2) when a
+`--lora-dir` is given to hash the local LoRA files. Matched entries get their
+`source`, `model_type`, trigger words and model tags filled in and are written
+back in batches.
+
+Both CivitAI model/model-version pages and flat records such as
+{"file_name": ..., "sha256": ..., "source": ..., "tags": [...], "trigger_words": [...]}
+are understood.
+"""
+import os, sys, json, gzip, time, hashlib, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from catalogue_index import CatalogueIndex, save_entry, display_name, files_by_name
+
+CHUNK_SIZE = 1 << 20
+MAX_RECORD_CHARS = 64 << 20   # a single record bigger than this is treated as corrupt
+TRIGGER_LABEL = "Trigger words"
+MODEL_TAGS_LABEL = "Model tags"
+
+# baseModel text from the dump -> the catalogue's Model Type options (first match wins)
+BASE_MODEL_MAP = [
+    ("illustrious", "Illustrious"),
+    ("pony", "Pony"),
+    ("sdxl", "SDXL"),
+    ("sd 3.5 large", "SD 3.5 Large"),
+    ("sd 3.5 medium", "SD 3.5 Medium"),
+    ("sd 3", "SD 3.0"),
+    ("sd 2.1", "SD 2.1"),
+    ("sd 2.0", "SD 2.0"),
+    ("sd 1.5", "SD 1.5"),
+    ("sd 1.4", "SD 1.5"),
+]
+
+
+def map_base_model(text):
+    t = (text or "").strip().lower()
+    for needle, model_type in BASE_MODEL_MAP:
+        if needle in t:
+            return model_type
+    return None
+
+
+# ===== Streaming readers =====
+
+def _open_text(path):
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_jsonl(f, stats):
+    for line in f:
+        stats["bytes"] += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            stats["bad_records"] += 1
+
+
+def iter_json_array(f, stats, array_key="items"):
+    """Yield the elements of a top-level JSON array (or of `{array_key: [...]}`) one at a time.
+
+    Only the current element and one read chunk are ever held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(CHUNK_SIZE)
+        stats["bytes"] += len(chunk)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def decode():
+        nonlocal pos
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or len(buf) - pos > MAX_RECORD_CHARS:
+                    raise
+                fill()  # value straddles the chunk boundary; read more and retry
+                continue
+            if end >= len(buf) and not eof:
+                fill()  # a number/literal cut off at the chunk end would decode short
+                continue
+            pos = end
+            return obj
+
+    skip(" \t\r\n\ufeff")
+    if pos >= len(buf):
+        return
+    if buf[pos] == "{":
+        # Wrapped dump, e.g. {"metadata": {...}, "items": [...]}: walk the top-level keys
+        # (values of other keys are decoded and dropped) until array_key's array starts
+        pos += 1
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf) or buf[pos] == "}":
+                raise ValueError(f'no "{array_key}" array found')
+            key = decode()
+            skip(" \t\r\n")
+            if pos >= len(buf) or buf[pos] != ":" or not isinstance(key, str):
+                raise ValueError("malformed top-level object")
+            pos += 1
+            skip(" \t\r\n")
+            if key == array_key:
+                if pos >= len(buf) or buf[pos] != "[":
+                    raise ValueError(f'"{array_key}" is not an array')
+                pos += 1
+                break
+            decode()
+    elif buf[pos] == "[":
+        pos += 1
+    else:
+        raise ValueError("expected a JSON array or object")
+
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buf):
+            raise ValueError("unexpected end of file inside array")
+        if buf[pos] == "]":
+            return
+        yield decode()
+
+
+def iter_records(path, stats, fmt="auto", array_key="items"):
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if fmt == "auto":
+        fmt = "jsonl" if name.endswith((".jsonl", ".ndjson")) else "json"
+    with _open_text(path) as f:
+        if fmt == "jsonl":
+            yield from iter_jsonl(f, stats)
+        else:
+            yield from iter_json_array(f, stats, array_key)
+
+
+# ===== Record normalisation =====
+
+def _words(value):
+    if isinstance(value, str):
+        value = [value]
+    out = []
+    for w in value or []:
+        if isinstance(w, dict):
+            w = w.get("name") or w.get("value") or ""
+        w = str(w).strip()
+        if w:
+            out.append(w)
+    return out
+
+
+def _file_targets(files):
+    names, hashes = set(), set()
+    for fi in files or []:
+        if not isinstance(fi, dict):
+            continue
+        if fi.get("name"):
+            names.add(os.path.basename(str(fi["name"])).lower())
+        for algo, h in (fi.get("hashes") or {}).items():
+            if algo.upper() in ("SHA256", "AUTOV2") and h:
+                hashes.add(str(h).lower())
+    return names, hashes
+
+
+def record_targets(rec):
+    """One dump record -> [(file names, hashes, fields)]; a CivitAI model yields one per version."""
+    if not isinstance(rec, dict):
+        return []
+    out = []
+
+    if isinstance(rec.get("modelVersions"), list):
+        model_id = rec.get("id")
+        model_tags = _words(rec.get("tags"))
+        for ver in rec["modelVersions"]:
+            if not isinstance(ver, dict):
+                continue
+            names, hashes = _file_targets(ver.get("files"))
+            source = f"https://civitai.com/models/{model_id}" if model_id else ""
+            if model_id and ver.get("id"):
+                source += f"?modelVersionId={ver['id']}"
+            out.append((names, hashes, {
+                "source": source,
+                "model_type": map_base_model(ver.get("baseModel")),
+                "trigger_words": _words(ver.get("trainedWords")),
+                "model_tags": model_tags,
+            }))
+        return out
+
+    if "files" in rec and ("trainedWords" in rec or "modelId" in rec):
+        # a single CivitAI model version
+        names, hashes = _file_targets(rec.get("files"))
+        source = f"https://civitai.com/models/{rec['modelId']}?modelVersionId={rec.get('id')}" if rec.get("modelId") else ""
+        out.append((names, hashes, {
+            "source": source,
+            "model_type": map_base_model(rec.get("baseModel")),
+            "trigger_words": _words(rec.get("trainedWords")),
+            "model_tags": [],
+        }))
+        return out
+
+    # flat record
+    names, hashes = set(), set()
+    for key in ("file_name", "fileName", "filename"):
+        if rec.get(key):
+            names.add(os.path.basename(str(rec[key])).lower())
+    for key in ("sha256", "hash", "autov2"):
+        if rec.get(key):
+            hashes.add(str(rec[key]).lower())
+    out.append((names, hashes, {
+        "source": str(rec.get("source") or rec.get("url") or ""),
+        "model_type": map_base_model(rec.get("model_type") or rec.get("baseModel")),
+        "trigger_words": _words(rec.get("trigger_words") or rec.get("trainedWords")),
+        "model_tags": _words(rec.get("tags")),
+    }))
+    return out
+
+
+# ===== Matching / merging =====
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def build_lookup(index, lora_dirs=(), workers=8):
+    """-> (by file name, by hash) over the catalogue; hashing only runs when lora_dirs are given."""
+    by_name, by_hash = {}, {}
+    for s in index.entries:
+        data = index.load_entry(s) if s is not None else None
+        if data is None:
+            continue
+        fname = os.path.basename(str(data.get("file_name") or "")).lower()
+        if fname:
+            by_name.setdefault(fname, []).append(data)
+        if data.get("sha256"):
+            digest = str(data["sha256"]).lower()
+            for key in (digest, digest[:10]):  # full SHA256 and CivitAI's AutoV2
+                by_hash.setdefault(key, []).append(data)
+
+    if lora_dirs:
+        local = files_by_name(lora_dirs)
+        todo = [(local[n], entries) for n, entries in by_name.items() if n in local]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (path, entries), digest in zip(todo, pool.map(lambda t: _sha256(t[0]), todo)):
+                for key in (digest, digest[:10]):  # full SHA256 and CivitAI's AutoV2
+                    by_hash.setdefault(key, []).extend(entries)
+    return by_name, by_hash
+
+
+def _has_tag(tags, value):
+    v = value.strip().lower()
+    for tag in tags:
+        existing = tag.get("value") if isinstance(tag, dict) else tag
+        if str(existing or "").strip().lower() == v:
+            return True
+    return False
+
+
+def merge_fields(data, fields, overwrite=False):
+    """Apply one record's fields to an entry in place -> list of changed field names."""
+    changed = []
+    source = fields.get("source")
+    if source and (overwrite or not str(data.get("source") or "").strip()) and data.get("source") != source:
+        data["source"] = source
+        changed.append("source")
+
+    model_type = fields.get("model_type")
+    current = str(data.get("model_type") or "").strip()
+    if model_type and (overwrite or current in ("", "Other")) and current != model_type:
+        data["model_type"] = model_type
+        changed.append("model_type")
+
+    tags = data.get("tags")
+    if not isinstance(tags, list):
+        tags = []
+    for label, words in ((TRIGGER_LABEL, fields.get("trigger_words")), (MODEL_TAGS_LABEL, fields.get("model_tags"))):
+        value = ", ".join(words or [])
+        if value and not _has_tag(tags, value):
+            tags.append({"label": label, "value": value})
+            changed.append("tags")
+    if "tags" in changed:
+        data["tags"] = tags
+    return changed
+
+
+def run_import(index, paths, dry_run=False, overwrite=False, lora_dirs=(), batch_size=200,
+               workers=8, fmt="auto", array_key="items", log=print):
+    stats = {"bytes": 0, "records": 0, "bad_records": 0, "matched_records": 0,
+             "entries_changed": 0, "field_changes": {}, "written": 0, "write_errors": 0}
+    t0 = time.perf_counter()
+    by_name, by_hash = build_lookup(index, lora_dirs, workers)
+    t_lookup = time.perf_counter() - t0
+    changed_entries = {}      # full_path -> entry (bounded by catalogue size, not dump size)
+    dirty = {}
+    samples = []
+
+    def flush():
+        if dry_run or not dirty:
+            dirty.clear()
+            return
+        items = list(dirty.items())
+        dirty.clear()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (fpath, _), err in zip(items, pool.map(lambda kv: _try_save(*kv), items)):
+                if err:
+                    stats["write_errors"] += 1
+                    log(f"[Import] Failed to write '{fpath}': {err}")
+                else:
+                    stats["written"] += 1
+
+    t_stream = time.perf_counter()
+    for path in paths:
+        for rec in iter_records(path, stats, fmt, array_key):
+            stats["records"] += 1
+            matched = False
+            for names, hashes, fields in record_targets(rec):
+                targets = {}
+                for n in names:
+                    for d in by_name.get(n, ()):
+                        targets[d["full_path"]] = d
+                for h in hashes:
+                    for d in by_hash.get(h, ()) or by_hash.get(h[:10], ()):
+                        targets[d["full_path"]] = d
+                for fpath, data in targets.items():
+                    matched = True
+                    changed = merge_fields(data, fields, overwrite)
+                    if not changed:
+                        continue
+                    for field in changed:
+                        stats["field_changes"][field] = stats["field_changes"].get(field, 0) + 1
+                    if fpath not in changed_entries:
+                        changed_entries[fpath] = data
+                        if len(samples) < 20:
+                            samples.append(f"{display_name(data)}: {', '.join(sorted(set(changed)))}")
+                    dirty[fpath] = data
+                    if len(dirty) >= batch_size:
+                        flush()
+            if matched:
+                stats["matched_records"] += 1
+    flush()
+
+    elapsed = time.perf_counter() - t_stream
+    stats["entries_changed"] = len(changed_entries)
+    stats["lookup_seconds"] = t_lookup
+    stats["stream_seconds"] = elapsed
+    stats["samples"] = samples
+    return stats
+
+
+def _try_save(fpath, data):
+    try:
+        save_entry(fpath, data)
+        return None
+    except Exception as e:
+        return e
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main(argv=None):
+    from character_catalogue import CATEGORY_FOLDERS
+
+    parser = argparse.ArgumentParser(description="Stream metadata dumps into the LoRA catalogue")
+    parser.add_argument("dumps", nargs="+", help=".json / .jsonl dump files (optionally .gz)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change; write nothing")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="replace existing source/model_type instead of only filling empty ones")
+    parser.add_argument("--lora-dir", action="append", default=[],
+                        help="folder with the .safetensors files, to also match by SHA256/AutoV2 (repeatable)")
+    parser.add_argument("--category", choices=list(CATEGORY_FOLDERS), help="only update this category")
+    parser.add_argument("--format", choices=("auto", "json", "jsonl"), default="auto")
+    parser.add_argument("--array-key", default="items", help='array to read from a wrapped JSON object (default "items")')
+    parser.add_argument("--batch-size", type=int, default=200, help="entries per write batch")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    folders = {args.category: CATEGORY_FOLDERS[args.category]} if args.category else CATEGORY_FOLDERS
+    index = CatalogueIndex(base_dir, folders, keep_entries=True)  # merged in place, then written
+    t0 = time.perf_counter()
+    index.load()
+    live = len(index)
+    print(f"[Import] Catalogue: {live} entries loaded in {time.perf_counter() - t0:.2f}s")
+
+    stats = run_import(index, args.dumps, dry_run=args.dry_run, overwrite=args.overwrite,
+                       lora_dirs=args.lora_dir, batch_size=max(1, args.batch_size),
+                       workers=max(1, args.workers), fmt=args.format, array_key=args.array_key)
+
+    secs = max(stats["stream_seconds"], 1e-9)
+    print(f"[Import] {stats['records']} records ({stats['bytes'] / 1e6:.1f} MB) in {secs:.2f}s: "
+          f"{stats['records'] / secs:.0f} records/s, {stats['bytes'] / 1e6 / secs:.1f} MB/s"
+          + (f"; hashing took {stats['lookup_seconds']:.2f}s" if args.lora_dir else ""))
+    print(f"[Import] matched records: {stats['matched_records']}, unreadable records: {stats['bad_records']}")
+    verb = "would change" if args.dry_run else "changed"
+    fields = ", ".join(f"{k} x{v}" for k, v in sorted(stats["field_changes"].items())) or "nothing"
+    print(f"[Import] {verb} {stats['entries_changed']} entries ({fields})")
+    for line in stats["samples"]:
+        print(f"    {line}")
+    if not args.dry_run:
+        print(f"[Import] wrote {stats['written']} files, {stats['write_errors']} failed")
+    peak = _peak_rss_mb()
+    if peak is not None:
+        print(f"[Import] peak memory: {peak:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
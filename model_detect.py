@@ -0,0 +1,329 @@
+# model_detect.py
+"""Detect which base model a LoRA was trained for from its safetensors header.
+
+Only the JSON header at the start of the file is read (one small read, plus
+a second one for unusually large headers); weights are never loaded. The
+architecture comes from tensor names and shapes:
+
+- Flux / SD3 are recognised by their transformer block names.
+- UNet models by the width of the cross-attention inputs (attn2 to_k/to_v):
+  768 = SD 1.x, 1024 = SD 2.x, 2048 = SDXL (incl. Pony / Illustrious).
+- Text-encoder-only LoRAs fall back to the text encoder layout, and the
+  kohya / modelspec metadata is the last resort.
+
+    python model_detect.py audit --lora-dir D:/LoRAs
+    python model_detect.py audit --lora-dir D:/LoRAs --fix
+    python model_detect.py file D:/LoRAs/some_lora.safetensors
+
+`audit` detects every catalogued LoRA found in the given folders in parallel
+and lists entries whose stored model_type belongs to another architecture.
+With --fix those entries are corrected through the bulk-edit journal.
+"""
+import os, sys, json, time, struct, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import app_settings
+from catalogue_index import CatalogueIndex, display_name, entry_text, read_text, files_by_name
+from bulk_edit import confirm_and_apply
+
+
+# The Model Type options offered by the editor
+MODEL_TYPES = ["Illustrious", "SD 1.5", "SD 2.0", "SD 2.1", "SD 3.0", "SD 3.5 Medium", "SD 3.5 Large",
+               "Pony", "SDXL", "Other"]
+
+ARCH_SD1 = "SD 1.x"
+ARCH_SD2 = "SD 2.x"
+ARCH_SDXL = "SDXL"
+ARCH_SD3 = "SD3"
+ARCH_FLUX = "Flux"
+
+# Architecture -> the model_type values that are consistent with it (first one is the default)
+ARCH_MODEL_TYPES = {
+    ARCH_SD1: ("SD 1.5",),
+    ARCH_SD2: ("SD 2.1", "SD 2.0"),
+    ARCH_SDXL: ("SDXL", "Pony", "Illustrious"),
+    ARCH_SD3: ("SD 3.0", "SD 3.5 Medium", "SD 3.5 Large"),
+    ARCH_FLUX: ("Other",),
+}
+
+# Cross-attention context width -> UNet architecture
+CONTEXT_DIMS = {768: ARCH_SD1, 1024: ARCH_SD2, 2048: ARCH_SDXL}
+
+HEADER_PROBE = 256 * 1024        # most LoRA headers fit in this first read
+MAX_HEADER = 100 * 1024 * 1024   # anything larger is not a real safetensors header
+
+LORA_EXTS = (".safetensors",)
+
+
+def read_header(path: str) -> dict:
+    """The safetensors JSON header (tensor name -> dtype/shape/offsets, plus __metadata__)."""
+    with open(path, "rb") as f:
+        head = f.read(HEADER_PROBE)
+        if len(head) < 8:
+            raise ValueError("file too short for a safetensors header")
+        (size,) = struct.unpack("<Q", head[:8])
+        if size > MAX_HEADER:
+            raise ValueError(f"header size {size} is not plausible")
+        if 8 + size > len(head):
+            head += f.read(8 + size - len(head))
+    header = json.loads(head[8:8 + size])
+    if not isinstance(header, dict):
+        raise ValueError("header is not a JSON object")
+    return header
+
+
+def _down_width(header: dict, key: str):
+    # input width of a LoRA down/A matrix: shape is [rank, in_features] (conv: [rank, in, kh, kw])
+    shape = (header.get(key) or {}).get("shape") or []
+    return shape[1] if len(shape) >= 2 else None
+
+
+def _is_down(key: str) -> bool:
+    return any(p in key for p in ("lora_down", "lora_A", "lora.down", "down.weight", "hada_w1_b"))
+
+
+def _metadata_arch(meta: dict):
+    spec = str(meta.get("modelspec.architecture") or "").lower()
+    base = str(meta.get("ss_base_model_version") or "").lower()
+    for text in (spec, base):
+        if "flux" in text:
+            return ARCH_FLUX
+        if "stable-diffusion-3" in text or text.startswith("sd3"):
+            return ARCH_SD3
+        if "xl" in text:
+            return ARCH_SDXL
+        if "stable-diffusion-v2" in text or text.startswith("sd_v2"):
+            return ARCH_SD2
+        if "stable-diffusion-v1" in text or text.startswith("sd_v1"):
+            return ARCH_SD1
+    if str(meta.get("ss_v2") or "").lower() == "true":
+        return ARCH_SD2
+    return None
+
+
+def _suggest(arch: str, header: dict, keys, meta: dict) -> str:
+    """Pick the most likely MODEL_TYPES value within an architecture."""
+    hints = " ".join(str(meta.get(k) or "") for k in
+                     ("ss_sd_model_name", "ss_base_model_version", "modelspec.title", "ss_output_name")).lower()
+    if arch == ARCH_SDXL:
+        if "pony" in hints:
+            return "Pony"
+        if "illustrious" in hints or "noob" in hints:
+            return "Illustrious"
+        return "SDXL"
+    if arch == ARCH_SD2:
+        return "SD 2.0" if any(t in hints for t in ("2-0", "2.0", "v2-base", "v2_0")) else "SD 2.1"
+    if arch == ARCH_SD3:
+        widths = [_down_width(header, k) for k in keys if _is_down(k) and ("to_q" in k or "qkv" in k)]
+        if 2432 in widths:
+            return "SD 3.5 Large"
+        if "3.5" in hints or "3_5" in hints or any("attn2" in k for k in keys):
+            return "SD 3.5 Medium"  # MMDiT-X: the first blocks have a second attention
+        return "SD 3.0"
+    return ARCH_MODEL_TYPES[arch][0]
+
+
+def detect_header(header: dict):
+    """-> {"arch", "model_type", "evidence"} or None if the header gives no usable clue."""
+    meta = header.get("__metadata__") or {}
+    keys = [k for k in header if k != "__metadata__"]
+
+    arch, evidence = None, ""
+    if any(p in k for k in keys for p in ("double_blocks", "single_blocks", "single_transformer_blocks")):
+        arch, evidence = ARCH_FLUX, "double/single transformer blocks"
+    elif any(p in k for k in keys for p in ("joint_blocks", "context_block")) or \
+            any(k.startswith(("transformer.transformer_blocks", "lora_transformer_transformer_blocks")) for k in keys):
+        arch, evidence = ARCH_SD3, "MMDiT joint blocks"
+    else:
+        for k in keys:
+            if "attn2" in k and ("to_k" in k or "to_v" in k) and _is_down(k):
+                width = _down_width(header, k)
+                if width in CONTEXT_DIMS:
+                    arch, evidence = CONTEXT_DIMS[width], f"cross-attention width {width}"
+                    break
+    if arch is None:
+        # text encoder only (or an unusual UNet layout)
+        if any(p in k for k in keys for p in ("lora_te2_", "text_encoder_2")):
+            arch, evidence = ARCH_SDXL, "second text encoder"
+        else:
+            for k in keys:
+                if ("lora_te_" in k or "text_encoder" in k) and _is_down(k) and "mlp" not in k and "fc" not in k:
+                    width = _down_width(header, k)
+                    if width in (768, 1024):
+                        arch = ARCH_SD1 if width == 768 else ARCH_SD2
+                        evidence = f"text encoder width {width}"
+                        break
+    if arch is None:
+        arch = _metadata_arch(meta)
+        evidence = "training metadata"
+    if arch is None:
+        return None
+    return {"arch": arch, "model_type": _suggest(arch, header, keys, meta), "evidence": evidence}
+
+
+def detect(path: str):
+    """detect_header() for a file; raises OSError/ValueError if it isn't a readable safetensors file."""
+    return detect_header(read_header(path))
+
+
+def agrees(model_type: str, arch: str) -> bool:
+    return (model_type or "").strip() in ARCH_MODEL_TYPES.get(arch, ())
+
+
+def normalise_model_type(value: str):
+    """Map stored/legacy spellings ("1.5", "sdxl", "SD2.1") onto MODEL_TYPES; None if unknown."""
+    v = (value or "").strip()
+    if v in MODEL_TYPES:
+        return v
+    t = v.lower().replace("_", " ").replace("-", " ")
+    compact = t.replace(" ", "")
+    for option in MODEL_TYPES:
+        if compact == option.lower().replace(" ", ""):
+            return option
+    legacy = {"1.5": "SD 1.5", "15": "SD 1.5", "sd15": "SD 1.5", "2.0": "SD 2.0", "2.1": "SD 2.1",
+              "xl": "SDXL", "sd3": "SD 3.0", "3.0": "SD 3.0"}
+    return legacy.get(compact)
+
+
+# ===== Locating LoRA files =====
+
+def load_lora_dirs():
+    dirs = app_settings.load().get("lora_dirs")
+    return [d for d in dirs if isinstance(d, str)] if isinstance(dirs, list) else []
+
+
+def remember_lora_dir(folder: str, keep: int = 10) -> None:
+    dirs = [folder] + [d for d in load_lora_dirs() if d != folder]
+    app_settings.update(lora_dirs=dirs[:keep])
+
+
+def find_lora(file_name: str, dirs=()):
+    """Path of the LoRA named by an entry's file_name (a full path, or a name inside one of dirs)."""
+    file_name = (file_name or "").strip()
+    if not file_name:
+        return None
+    if os.path.isfile(file_name):
+        return file_name
+    for d in dirs:
+        candidate = os.path.join(d, os.path.basename(file_name))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+# ===== Batch audit =====
+
+def audit(index, lora_dirs, workers: int = 16, category=None):
+    """-> (results, stats); results are (summary, path, detection or None, error) per located LoRA."""
+    t0 = time.perf_counter()
+    files = files_by_name(lora_dirs, LORA_EXTS)
+    t_index = time.perf_counter() - t0
+
+    targets = []
+    not_found = []
+    for s in index.entries:
+        if s is None or (category and s.category != category):
+            continue
+        name = os.path.basename(s.file_name.strip().replace("\\", "/")).lower()
+        if not name:
+            continue
+        path = files.get(name)
+        if path is None:
+            not_found.append(s)
+        else:
+            targets.append((s, path))
+
+    def one(target):
+        try:
+            return detect(target[1]), None
+        except (OSError, ValueError) as e:
+            return None, e
+
+    t0 = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for (s, path), (found, err) in zip(targets, pool.map(one, targets, chunksize=16)):
+            results.append((s, path, found, err))
+    t_detect = time.perf_counter() - t0
+    stats = {"lora_files": len(files), "not_found": not_found, "index_seconds": t_index, "detect_seconds": t_detect}
+    return results, stats
+
+
+def main(argv=None):
+    from character_catalogue import CATEGORY_FOLDERS
+
+    parser = argparse.ArgumentParser(description="Detect LoRA base architectures from safetensors headers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_file = sub.add_parser("file", help="detect one or more files")
+    p_file.add_argument("paths", nargs="+")
+    p_audit = sub.add_parser("audit", help="compare every entry's model_type with its LoRA file")
+    p_audit.add_argument("--lora-dir", action="append", default=[],
+                         help="folder with the .safetensors files (repeatable; default: folders used in the editor)")
+    p_audit.add_argument("--category", choices=list(CATEGORY_FOLDERS))
+    p_audit.add_argument("--workers", type=int, default=16)
+    p_audit.add_argument("--fix", action="store_true", help="set mismatched/unknown model types to the detected one")
+    p_audit.add_argument("--yes", "-y", action="store_true", help="don't ask for confirmation")
+    args = parser.parse_args(argv)
+
+    if args.command == "file":
+        for path in args.paths:
+            try:
+                found = detect(path)
+            except (OSError, ValueError) as e:
+                print(f"{path}: unreadable ({e})")
+                continue
+            if found is None:
+                print(f"{path}: unknown")
+            else:
+                print(f"{path}: {found['arch']} -> {found['model_type']} ({found['evidence']})")
+        return 0
+
+    lora_dirs = args.lora_dir or load_lora_dirs()
+    if not lora_dirs:
+        print("[Detect] No LoRA folders: pass --lora-dir (or use Detect in the editor once)")
+        return 2
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    index = CatalogueIndex(base_dir, CATEGORY_FOLDERS, keep_entries=args.fix)
+    index.load()
+
+    results, stats = audit(index, lora_dirs, max(1, args.workers), args.category)
+    mismatched, unknown, ok = [], [], 0
+    for s, path, found, err in results:
+        if found is None:
+            unknown.append((s, path, err))
+        elif agrees(s.model_type, found["arch"]):
+            ok += 1
+        else:
+            mismatched.append((s, found))
+
+    n = len(results)
+    print(f"[Detect] {stats['lora_files']} LoRA files indexed in {stats['index_seconds']:.2f}s; "
+          f"{n} entries checked in {stats['detect_seconds']:.2f}s ({n / max(stats['detect_seconds'], 1e-9):.0f} files/s)")
+    print(f"[Detect] {ok} agree, {len(mismatched)} mismatched, {len(unknown)} undetected, "
+          f"{len(stats['not_found'])} LoRA files not found")
+    for s, found in mismatched:
+        print(f"    MISMATCH {display_name(s)} [{s.category}]: stored {s.model_type or '(empty)'!r}, "
+              f"detected {found['arch']} ({found['evidence']})")
+    for s, path, err in unknown[:20]:
+        print(f"    UNKNOWN  {display_name(s)} [{s.category}]: {path}" + (f" ({err})" if err else ""))
+    if not args.fix or not mismatched:
+        return 1 if mismatched else 0
+
+    changes = []
+    for s, found in mismatched:
+        data = index.load_entry(s)
+        if data is None:
+            continue
+        before = read_text(s.path)
+        if before is None:
+            continue
+        edited = dict(data, model_type=found["model_type"])
+        changes.append((s.path, before, entry_text(edited), edited))
+    ops = [("set_detected_model_type",) + tuple(lora_dirs)]
+    return confirm_and_apply(base_dir, changes, "model type audit", ops,
+                             f"Set the detected model type on {len(changes)} entries?", "[Detect]", args.yes,
+                             max(1, args.workers), cancel_code=1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
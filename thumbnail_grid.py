@@ -0,0 +1,370 @@
+# thumbnail_grid.py
+"""Virtualized thumbnail grid for the catalogue.
+
+Only the rows on screen have anything drawn: a tile is a handful of canvas
+items (background, image, caption) taken from a small pool and moved to a new
+position when it scrolls out of view, so 20k entries cost the same number of
+items as 20. Thumbnails are decoded by ThumbnailLoader on background threads
+in viewport order (top-left first); tiles show a placeholder until theirs is
+ready, and scrolled-past requests are dropped rather than queued.
+
+    grid = ThumbnailGrid(parent, index, base_dir, on_select=lambda summary, pos: ...)
+    grid.set_items(summaries)    # replace (scrolls to top)
+    grid.extend(more_summaries)  # append while a load streams in
+    grid.select(pos)
+"""
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+import customtkinter as ctk
+from PIL import ImageTk
+
+from image_cache import load_thumbnail
+from image_store import resolve as resolve_image_path
+
+THUMB_SIZE = 128
+TILE_W, TILE_H = 150, 172  # thumbnail + caption + padding
+TILE_PAD = 6
+CAPTION_CHARS = 22
+THUMB_WORKERS = 3
+THUMB_CACHE_ITEMS = 512  # decoded PIL thumbnails (~48 KB each)
+PHOTO_CACHE_ITEMS = 128  # Tk images kept for tiles scrolled just off screen
+POLL_MS = 40
+SCROLL_STEP = 20  # px per scroll unit
+
+TILE_BG = "#3a3a3a"
+TILE_SELECTED = "#1f6aa5"
+TEXT_COLOUR = "#dcdcdc"
+PLACEHOLDER_COLOUR = "#8a8a8a"
+
+
+class ThumbnailLoader:
+    """Entry thumbnails decoded on a few background threads, most-wanted first.
+
+    request() replaces the wish list with what is on screen now; finished keys
+    are collected with drain() on the UI thread. The LRU holds PIL images (or
+    None for entries without a readable image); Tk images are made by the grid.
+    """
+
+    def __init__(self, index, base_dir: str, size: int = THUMB_SIZE,
+                 workers: int = THUMB_WORKERS, max_items: int = THUMB_CACHE_ITEMS):
+        self.index = index
+        self.base_dir = base_dir
+        self.size = size
+        self.max_items = max_items
+        self._cache = OrderedDict()    # entry path -> PIL image or None
+        self._pending = OrderedDict()  # entry path -> summary, in viewport order
+        self._inflight = set()
+        self._done = []
+        self._generation = 0           # bumped by clear(); older in-flight results are dropped
+        self._cond = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._loop, name=f"thumbnail-{i}", daemon=True).start()
+
+    def get(self, key):
+        """-> (ready, image); image is None when the entry has no usable image."""
+        with self._cond:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return True, self._cache[key]
+        return False, None
+
+    def request(self, summaries):
+        with self._cond:
+            self._pending = OrderedDict(
+                (s.path, s) for s in summaries
+                if s.path not in self._cache and s.path not in self._inflight)
+            if self._pending:
+                self._cond.notify_all()
+
+    def forget(self, key):
+        with self._cond:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        """Forget every thumbnail (e.g. on Refresh, after images were changed outside the app)."""
+        with self._cond:
+            self._cache.clear()
+            self._pending.clear()
+            self._generation += 1
+
+    def drain(self):
+        with self._cond:
+            done, self._done = self._done, []
+        return done
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key, summary = self._pending.popitem(last=False)
+                self._inflight.add(key)
+                generation = self._generation
+            img = None
+            try:
+                data = self.index.load_entry(summary)
+                path = resolve_image_path((data or {}).get("image_path", "").strip(), self.base_dir)
+                if path:
+                    img = load_thumbnail(path, self.size)
+            except Exception:
+                img = None  # missing/unreadable image: the tile says so
+            with self._cond:
+                self._inflight.discard(key)
+                if generation == self._generation:
+                    self._cache[key] = img
+                    while len(self._cache) > self.max_items:
+                        self._cache.popitem(last=False)
+                self._done.append(key)  # a dropped result still wakes the tile so it asks again
+
+
+class _Tile:
+    __slots__ = ("pos", "key", "bg", "image", "caption", "placeholder", "photo")
+
+    def __init__(self, canvas):
+        self.pos = None
+        self.key = None
+        self.photo = None
+        self.bg = canvas.create_rectangle(0, 0, 0, 0, outline="", width=3, state="hidden")
+        self.image = canvas.create_image(0, 0, anchor="center", state="hidden")
+        self.placeholder = canvas.create_text(0, 0, fill=PLACEHOLDER_COLOUR, font=("Arial", 10), state="hidden")
+        self.caption = canvas.create_text(0, 0, fill=TEXT_COLOUR, font=("Arial", 11), state="hidden")
+
+
+class ThumbnailGrid(ctk.CTkFrame):
+    def __init__(self, parent, index, base_dir, on_select, on_hover=None, columns=4, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_select = on_select
+        self.on_hover = on_hover
+        self.colour_for = None
+        self.items = []
+        self.selected = None
+        self.loader = ThumbnailLoader(index, base_dir)
+
+        self._tiles = {}  # pos -> _Tile currently showing it
+        self._free = []   # recycled tiles
+        self._photos = OrderedDict()  # key -> PhotoImage
+        self._cols = 0
+        self._hover_pos = None
+        self._layout_pending = False
+
+        bg = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
+        self.canvas = tk.Canvas(self, width=columns * TILE_W, bg=bg, highlightthickness=0,
+                                yscrollincrement=SCROLL_STEP)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.grid(row=0, column=0, sticky="nswe")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self._empty_text = self.canvas.create_text(columns * TILE_W // 2, 40, text="(No JSONs found)",
+                                                   fill=TEXT_COLOUR, state="hidden")
+
+        self.canvas.bind("<Configure>", lambda e: self._schedule_layout())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", self._on_leave)
+        # bound on the canvas only: the "all" tag belongs to CTkScrollableFrame's own wheel handling
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(seq, self._on_wheel)
+        self.after(POLL_MS, self._poll)
+
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        if hasattr(self, "canvas"):
+            self.canvas.configure(bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"]))
+
+    # ===== Items =====
+
+    def set_items(self, items, colour_for=None):
+        """Show these summaries (in order); colour_for(summary) may pick a tile background."""
+        self.items = list(items)
+        self.colour_for = colour_for
+        self.selected = None
+        self._recycle_all()
+        self.canvas.yview_moveto(0)
+        self._schedule_layout()
+
+    def extend(self, items):
+        if items:
+            self.items.extend(items)
+            self._schedule_layout()
+
+    def select(self, pos):
+        old, self.selected = self.selected, pos
+        for p in (old, pos):
+            tile = self._tiles.get(p)
+            if tile is not None:
+                self._paint(tile)
+        self.see(pos)
+
+    def see(self, pos):
+        if pos is None or not self._cols:
+            return
+        top = (pos // self._cols) * TILE_H
+        view_top = self.canvas.canvasy(0)
+        view_h = self.canvas.winfo_height()
+        total = self._total_height()
+        if top < view_top:
+            self.canvas.yview_moveto(top / total)
+        elif top + TILE_H > view_top + view_h:
+            self.canvas.yview_moveto(max(0, top + TILE_H - view_h) / total)
+        self._schedule_layout()
+
+    def refresh_thumbnail(self, key):
+        """Drop a cached thumbnail (e.g. after the entry's image changed)."""
+        self.loader.forget(key)
+        self._photos.pop(key, None)
+        self._schedule_layout()
+
+    def clear_thumbnails(self):
+        """Drop every cached thumbnail; visible tiles reload theirs."""
+        self.loader.clear()
+        self._photos.clear()
+        self._recycle_all()
+        self._schedule_layout()
+
+    # ===== Layout =====
+
+    def _total_height(self):
+        rows = -(-len(self.items) // max(self._cols, 1))
+        return max(rows * TILE_H, 1)
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_layout()
+
+    def _schedule_layout(self):
+        # coalesce scroll/resize bursts into one pass per idle
+        if not self._layout_pending:
+            self._layout_pending = True
+            self.after_idle(self._layout)
+
+    def _recycle_all(self):
+        for tile in self._tiles.values():
+            self._hide(tile)
+            self._free.append(tile)
+        self._tiles.clear()
+
+    def _layout(self):
+        self._layout_pending = False
+        cols = max(1, self.canvas.winfo_width() // TILE_W)
+        if cols != self._cols:
+            self._cols = cols
+            self._recycle_all()  # every position moves
+        self.canvas.configure(scrollregion=(0, 0, cols * TILE_W, self._total_height()))
+        self.canvas.itemconfigure(self._empty_text, state="hidden" if self.items else "normal")
+
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // TILE_H))
+        last_row = int((top + self.canvas.winfo_height()) // TILE_H)
+        visible = range(first_row * cols, min(len(self.items), (last_row + 1) * cols))
+
+        for pos in [p for p in self._tiles if p not in visible]:
+            tile = self._tiles.pop(pos)
+            self._hide(tile)
+            self._free.append(tile)
+        for pos in visible:
+            if pos not in self._tiles:
+                tile = self._free.pop() if self._free else _Tile(self.canvas)
+                self._tiles[pos] = tile
+                self._place(tile, pos)
+        self.loader.request(self.items[p] for p in visible)
+
+    def _hide(self, tile):
+        tile.pos = tile.key = tile.photo = None
+        for item in (tile.bg, tile.image, tile.placeholder, tile.caption):
+            self.canvas.itemconfigure(item, state="hidden")
+
+    def _place(self, tile, pos):
+        summary = self.items[pos]
+        tile.pos, tile.key = pos, summary.path
+        x0 = (pos % self._cols) * TILE_W + TILE_PAD // 2
+        y0 = (pos // self._cols) * TILE_H + TILE_PAD // 2
+        cx = x0 + (TILE_W - TILE_PAD) // 2
+        cy = y0 + TILE_PAD + THUMB_SIZE // 2
+        self.canvas.coords(tile.bg, x0, y0, x0 + TILE_W - TILE_PAD, y0 + TILE_H - TILE_PAD)
+        self.canvas.coords(tile.image, cx, cy)
+        self.canvas.coords(tile.placeholder, cx, cy)
+        self.canvas.coords(tile.caption, cx, y0 + TILE_PAD + THUMB_SIZE + 14)
+        name = summary.name
+        if len(name) > CAPTION_CHARS:
+            name = name[:CAPTION_CHARS - 3] + "..."
+        self.canvas.itemconfigure(tile.caption, text=name, state="normal")
+        self._paint(tile)
+        self._show_thumbnail(tile)
+
+    def _paint(self, tile):
+        summary = self.items[tile.pos]
+        fill = (self.colour_for(summary) if self.colour_for else None) or TILE_BG
+        outline = TILE_SELECTED if tile.pos == self.selected else ""
+        self.canvas.itemconfigure(tile.bg, fill=fill, outline=outline, state="normal")
+
+    def _show_thumbnail(self, tile):
+        ready, img = self.loader.get(tile.key)
+        if ready and img is not None:
+            photo = self._photos.get(tile.key)
+            if photo is None:
+                photo = ImageTk.PhotoImage(img, master=self.canvas)
+                self._photos[tile.key] = photo
+                while len(self._photos) > PHOTO_CACHE_ITEMS + len(self._tiles):
+                    self._photos.popitem(last=False)
+            else:
+                self._photos.move_to_end(tile.key)
+            tile.photo = photo
+            self.canvas.itemconfigure(tile.image, image=photo, state="normal")
+            self.canvas.itemconfigure(tile.placeholder, state="hidden")
+        else:
+            tile.photo = None
+            self.canvas.itemconfigure(tile.image, image="", state="hidden")
+            self.canvas.itemconfigure(tile.placeholder, text="No image" if ready else "Loading...",
+                                      state="normal")
+
+    def _poll(self):
+        done = self.loader.drain()
+        if done and self._tiles:
+            done = set(done)
+            for tile in self._tiles.values():
+                if tile.key in done:
+                    self._show_thumbnail(tile)
+                    if not self.loader.get(tile.key)[0]:
+                        self._schedule_layout()  # result from before clear(); request it again
+        self.after(POLL_MS, self._poll)
+
+    # ===== Input =====
+
+    def _pos_at(self, event):
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        col, row = int(x // TILE_W), int(y // TILE_H)
+        if not self._cols or col >= self._cols or x < 0 or y < 0:
+            return None
+        pos = row * self._cols + col
+        return pos if pos < len(self.items) else None
+
+    def _on_click(self, event):
+        pos = self._pos_at(event)
+        if pos is not None:
+            self.select(pos)
+            self.on_select(self.items[pos], pos)
+
+    def _on_motion(self, event):
+        pos = self._pos_at(event)
+        if pos != self._hover_pos:
+            self._hover_pos = pos
+            if pos is not None and self.on_hover:
+                self.on_hover(self.items[pos])
+
+    def _on_leave(self, _event):
+        self._hover_pos = None
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) in (4, 5):
+            units = -3 if event.num == 4 else 3
+        elif abs(event.delta) >= 120:
+            units = -3 * int(event.delta / 120)  # Windows: 120 per notch
+        else:
+            units = -event.delta  # macOS: small deltas
+        self.canvas.yview_scroll(units, "units")
+        self._schedule_layout()
+        return "break"